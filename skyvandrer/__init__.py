@@ -57,6 +57,8 @@ ISSUE_STORAGE_ENV = os.getenv(f'{APP_ENV}_ISSUE_STORAGE', '')
 ISSUE_STORAGE = pathlib.Path(ISSUE_STORAGE_ENV).expanduser().resolve() if ISSUE_STORAGE_ENV else ISSUE_STORAGE_DEFAULT
 
 
+TRUTHY = ('1', 'TRUE', 'YES', 'ON')
+
 CollectorType = dict[str, Union[bool, int, str, None, dict[str, str], list[object]]]
 QueryType = dict[str, Union[bool, int, str, list[str]]]
 
@@ -75,10 +77,17 @@ __all__: list[str] = [
     'VERSION_DOTTED_TRIPLE',
     'CollectorType',
     'QueryType',
+    'env_flag',
     'log',
 ]
 
 
+def env_flag(name: str, default: bool = False) -> bool:
+    """The boolean switch from the environment variable name (1, true, yes, or on in any case enable it)."""
+    value = os.getenv(name)
+    return default if value is None else value.strip().upper() in TRUTHY
+
+
 def credentials_or_die(api_base_url: str = API_BASE_URL, api_user: str = API_USER, api_token: str = API_TOKEN) -> bool:
     """Verify the credentials given are plausible (For now, truthy suffices.)"""
     if not all(value for value in (api_base_url, api_user, api_token)):
@@ -0,0 +1,64 @@
+"""Cloud Walker (Norwegian: skyvandrer) - persistent index of moved or renamed issue keys."""
+
+import os
+import pathlib
+import time
+from typing import Union
+
+from skyvandrer import APP_ENV, ISSUE_STORAGE, log
+from skyvandrer.sqlite_store import Shared, SQLiteStore
+
+PathlikeType = Union[str, pathlib.Path]
+
+ALIAS_INDEX_DEFAULT = ISSUE_STORAGE.parent / 'issue-aliases.sqlite'
+ALIAS_INDEX = os.getenv(f'{APP_ENV}_ALIAS_INDEX', str(ALIAS_INDEX_DEFAULT))
+MAX_HOPS = 16  # issues moved more often than that are resolved only partially
+
+SCHEMA = 'CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, canonical TEXT NOT NULL, id TEXT, seen REAL)'
+
+
+class Aliases(SQLiteStore):
+    """Old issue keys mapped to the canonical key (and id) the server answered with."""
+
+    def __init__(self, path: PathlikeType = ALIAS_INDEX) -> None:
+        super().__init__(path, SCHEMA)
+        self.resolved = 0
+        self.recorded = 0
+
+    def canonical(self, issue_key: str) -> str:
+        """The current key of the issue (following chains of moves) or the key itself if it is no alias."""
+        current = issue_key.upper()
+        with self._lock:
+            for _ in range(MAX_HOPS):
+                row = self._db.execute('SELECT canonical FROM aliases WHERE alias = ?', (current,)).fetchone()
+                if row is None or row[0] == current:
+                    break
+                current = row[0]
+            if current != issue_key.upper():
+                self.resolved += 1
+        return current
+
+    def remember(self, alias: str, canonical: str, issue_id: Union[str, None] = None) -> None:
+        """Record that requesting alias delivered the issue canonical (with issue_id)."""
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO aliases (alias, canonical, id, seen) VALUES (?, ?, ?, ?)',
+                (alias.upper(), canonical.upper(), issue_id, time.time()),
+            )
+            self._db.execute('DELETE FROM aliases WHERE alias = ?', (canonical.upper(),))  # moved back
+            self.recorded += 1
+        log.info(f'issue {alias} is known as {canonical} now (id {issue_id})')
+
+    def stats(self) -> dict[str, int]:
+        """Indexed aliases and the resolutions and records of this process."""
+        with self._lock:
+            (count,) = self._db.execute('SELECT COUNT(*) FROM aliases').fetchone()
+        return {'aliases': count, 'resolved': self.resolved, 'recorded': self.recorded}
+
+
+_index = Shared(Aliases, 'alias index of moved issues')
+
+
+def aliases() -> Aliases:
+    """The process wide alias index (opened on first use)."""
+    return _index()
@@ -1,22 +1,136 @@
 """Cloud Walker (Norwegian: skyvandrer) - application programming interface."""
 
+from typing import Iterator, Union
+
 from requests.auth import HTTPBasicAuth
 
-from skyvandrer import API_BASE_URL, API_TOKEN, API_USER, CollectorType
+from skyvandrer import API_BASE_URL, API_TOKEN, API_USER, ISSUE_STORAGE, CollectorType
+from skyvandrer.batch import BATCH_SIZE, BATCH_SIZE_MAX, PRECHECK
+from skyvandrer.batch import fetch_issues_batched as impl_fetch_issues_batched
+from skyvandrer.batch import stale_keys as impl_stale_keys
+from skyvandrer.changelog import FULL_CHANGELOG
+from skyvandrer.codec import CODEC_SPEC
+from skyvandrer.codec import benchmark as impl_benchmark_codecs
+from skyvandrer.columns import COLUMN_WORKERS, COLUMNS_FOLDER
+from skyvandrer.columns import extract_columns as impl_extract_columns
 from skyvandrer.fetch import fetch_issues as impl_fetch_issues
-from skyvandrer.fetch import WAIT_MAX_MILLIS
+from skyvandrer.fetch import FETCH_WORKERS, PASSTHROUGH, WAIT_MAX_MILLIS
 from skyvandrer.find_groups import find_groups as impl_find_groups
+from skyvandrer.find_groups import iter_groups as impl_iter_groups
+from skyvandrer.fingerprint import benchmark as impl_benchmark_inventory
 from skyvandrer.get_audit_records import get_audit_records as impl_get_audit_records
 from skyvandrer.get_server_info import get_server_info as impl_get_server_info
+from skyvandrer.get_users_from_group import get_users_from_group as impl_get_users_from_group
+from skyvandrer.get_users_from_group import iter_users_from_group as impl_iter_users_from_group
 from skyvandrer.get_workflows_paginated import get_workflows_paginated as impl_get_workflows_paginated
+from skyvandrer.get_workflows_paginated import iter_workflows as impl_iter_workflows
+from skyvandrer.inventory import INVENTORY_FOLDER, INVENTORY_PROJECT_WORKERS
+from skyvandrer.inventory import inventize_storage as impl_inventize_storage
+from skyvandrer.journal import JOURNAL
+from skyvandrer.journal import fetch_issues_journaled as impl_fetch_issues_journaled
+from skyvandrer.paginate import PAGE_CONCURRENCY
+from skyvandrer.pipeline import COMPRESS_WORKERS
+from skyvandrer.pipeline import fetch_issues_pipelined as impl_fetch_issues_pipelined
+from skyvandrer.search_for_dashboards import iter_dashboards as impl_iter_dashboards
 from skyvandrer.search_for_dashboards import search_for_dashboards as impl_search_for_dashboards
+from skyvandrer.search_for_filters import iter_filters as impl_iter_filters
 from skyvandrer.search_for_filters import search_for_filters as impl_search_for_filters
+from skyvandrer.search_priorities import iter_priorities as impl_iter_priorities
 from skyvandrer.search_priorities import search_priorities as impl_search_priorities
+from skyvandrer.storage import migrate as impl_migrate_to_packs
+from skyvandrer.sync import SYNC_OVERLAP_MINUTES
+from skyvandrer.sync import updated_keys as impl_updated_keys
+from skyvandrer.verify import VERIFY_WORKERS
+from skyvandrer.verify import verify_archive as impl_verify_archive
+
+
+def benchmark_codecs(
+    specs: Union[tuple[str, ...], None] = None, storage: str = str(ISSUE_STORAGE), sample_size: int = 200
+) -> dict[str, dict[str, float]]:
+    """Proxy to benchmark-codecs/3 implementation."""
+    if specs:
+        return impl_benchmark_codecs(specs, storage=storage, sample_size=sample_size)
+    return impl_benchmark_codecs(storage=storage, sample_size=sample_size)
+
+
+def benchmark_inventory(file_count: int = 3000, workers: int = 0) -> dict[str, dict[str, float]]:
+    """Proxy to benchmark-inventory/2 implementation."""
+    if workers > 0:
+        return impl_benchmark_inventory(file_count, workers=workers)
+    return impl_benchmark_inventory(file_count)
 
 
-def fetch_issues(args: list[str], auth_token: HTTPBasicAuth, wait_max_millis: float = WAIT_MAX_MILLIS) -> None:
-    """Proxy to fetch-issues/3 implementation."""
-    return impl_fetch_issues(args, auth_token=auth_token, wait_max_millis=wait_max_millis)
+def fetch_issues(
+    args: list[str],
+    auth_token: HTTPBasicAuth,
+    wait_max_millis: float = WAIT_MAX_MILLIS,
+    workers: int = FETCH_WORKERS,
+    passthrough: bool = PASSTHROUGH,
+    compressors: int = COMPRESS_WORKERS,
+    codec_spec: str = CODEC_SPEC,
+    batch_size: int = BATCH_SIZE,
+    precheck: bool = PRECHECK,
+    full_changelog: bool = FULL_CHANGELOG,
+    journal: str = JOURNAL,
+    refresh: bool = False,
+) -> None:
+    """Proxy to fetch-issues/12 implementation.
+
+    With precheck only the issues updated on the server since they were archived are fetched.
+    With full_changelog truncated embedded changelogs are completed (merged with the archived entries).
+    With a journal path the keys are fetched issue by issue through that resumable job journal
+    (with refresh keys already finished in that journal are fetched again).
+    Keys are fetched in search batches of batch_size if positive, else staged with compression in compressors
+    processes if positive, else issue by issue.
+    """
+    if precheck and args:
+        args = impl_stale_keys(args, auth_token, batch_size=batch_size or BATCH_SIZE_MAX)
+        if not args:
+            return None
+    if journal:
+        impl_fetch_issues_journaled(
+            args,
+            auth_token=auth_token,
+            journal_path=journal,
+            wait_max_millis=wait_max_millis,
+            workers=workers,
+            passthrough=passthrough,
+            codec_spec=codec_spec,
+            full_changelog=full_changelog,
+            refresh=refresh,
+        )
+        return None
+    if batch_size > 0:
+        impl_fetch_issues_batched(
+            args,
+            auth_token=auth_token,
+            batch_size=batch_size,
+            workers=workers,
+            codec_spec=codec_spec,
+            full_changelog=full_changelog,
+        )
+        return None
+    if compressors > 0:
+        impl_fetch_issues_pipelined(
+            args,
+            auth_token=auth_token,
+            wait_max_millis=wait_max_millis,
+            workers=workers,
+            passthrough=passthrough,
+            compressors=compressors,
+            codec_spec=codec_spec,
+            full_changelog=full_changelog,
+        )
+        return None
+    return impl_fetch_issues(
+        args,
+        auth_token=auth_token,
+        wait_max_millis=wait_max_millis,
+        workers=workers,
+        passthrough=passthrough,
+        codec_spec=codec_spec,
+        full_changelog=full_changelog,
+    )
 
 
 def find_groups(
@@ -40,29 +154,215 @@ def get_server_info(
     return impl_get_server_info(api_base_url=api_base_url, api_user=api_user, api_token=api_token)
 
 
+def get_users_from_group(
+    group_id_or_name: str,
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = PAGE_CONCURRENCY,
+) -> CollectorType:
+    """Proxy to get-users-from-group/1 implementation."""
+    return impl_get_users_from_group(
+        group_id_or_name, api_base_url=api_base_url, api_user=api_user, api_token=api_token, concurrency=concurrency
+    )
+
+
 def get_workflows_paginated(
-    api_base_url: str = API_BASE_URL, api_user: str = API_USER, api_token: str = API_TOKEN
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = PAGE_CONCURRENCY,
 ) -> CollectorType:
     """Proxy to get-workflows-paginated/0 implementation."""
-    return impl_get_workflows_paginated(api_base_url=api_base_url, api_user=api_user, api_token=api_token)
+    return impl_get_workflows_paginated(
+        api_base_url=api_base_url, api_user=api_user, api_token=api_token, concurrency=concurrency
+    )
+
+
+def extract_columns(
+    storage: str = str(ISSUE_STORAGE),
+    folder: str = str(COLUMNS_FOLDER),
+    projects: Union[list[str], None] = None,
+    workers: int = COLUMN_WORKERS,
+    force: bool = False,
+) -> dict[str, dict[str, int]]:
+    """Proxy to extract-columns/3 implementation (one columnar table per project below storage)."""
+    return impl_extract_columns(root=storage, folder=folder, projects=projects, workers=workers, force=force)
+
+
+def inventize_storage(
+    storage: str = str(ISSUE_STORAGE),
+    folder: str = str(INVENTORY_FOLDER),
+    projects: Union[list[str], None] = None,
+    workers: int = INVENTORY_PROJECT_WORKERS,
+    force: bool = False,
+) -> dict[str, dict[str, object]]:
+    """Proxy to inventory/3 implementation (all or the given projects below storage in one pass)."""
+    return impl_inventize_storage(root=storage, folder=folder, projects=projects, workers=workers, force=force)
+
+
+def migrate_to_packs(storage: str = str(ISSUE_STORAGE), projects: Union[list[str], None] = None) -> dict[str, int]:
+    """Proxy to migrate-to-packs/2 implementation."""
+    return impl_migrate_to_packs(root=storage, projects=projects)
 
 
 def search_for_dashboards(
-    api_base_url: str = API_BASE_URL, api_user: str = API_USER, api_token: str = API_TOKEN
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = PAGE_CONCURRENCY,
 ) -> CollectorType:
     """Proxy to search-for-dashboards/0 implementation."""
-    return impl_search_for_dashboards(api_base_url=api_base_url, api_user=api_user, api_token=api_token)
+    return impl_search_for_dashboards(
+        api_base_url=api_base_url, api_user=api_user, api_token=api_token, concurrency=concurrency
+    )
 
 
 def search_for_filters(
-    api_base_url: str = API_BASE_URL, api_user: str = API_USER, api_token: str = API_TOKEN
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = PAGE_CONCURRENCY,
 ) -> CollectorType:
     """Proxy to search-for-filters/0 implementation."""
-    return impl_search_for_filters(api_base_url=api_base_url, api_user=api_user, api_token=api_token)
+    return impl_search_for_filters(
+        api_base_url=api_base_url, api_user=api_user, api_token=api_token, concurrency=concurrency
+    )
 
 
 def search_priorities(
-    api_base_url: str = API_BASE_URL, api_user: str = API_USER, api_token: str = API_TOKEN
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = PAGE_CONCURRENCY,
 ) -> CollectorType:
     """Proxy to search-priorities/0 implementation."""
-    return impl_search_priorities(api_base_url=api_base_url, api_user=api_user, api_token=api_token)
+    return impl_search_priorities(
+        api_base_url=api_base_url, api_user=api_user, api_token=api_token, concurrency=concurrency
+    )
+
+
+def sync_issues(
+    projects: list[str],
+    auth_token: HTTPBasicAuth,
+    overlap_minutes: int = SYNC_OVERLAP_MINUTES,
+    workers: int = FETCH_WORKERS,
+    passthrough: bool = PASSTHROUGH,
+    compressors: int = COMPRESS_WORKERS,
+    codec_spec: str = CODEC_SPEC,
+    batch_size: int = BATCH_SIZE,
+    precheck: bool = PRECHECK,
+    full_changelog: bool = FULL_CHANGELOG,
+    journal: str = JOURNAL,
+) -> dict[str, int]:
+    """Proxy to sync-issues/2 implementation (refetch issues updated since the archive watermark per project)."""
+    counts = {}
+    for project in projects:
+        keys = impl_updated_keys(project, auth_token, overlap_minutes=overlap_minutes)
+        counts[project.upper()] = len(keys)
+        if keys:
+            fetch_issues(
+                keys,
+                auth_token,
+                workers=workers,
+                passthrough=passthrough,
+                compressors=compressors,
+                codec_spec=codec_spec,
+                batch_size=batch_size,
+                precheck=precheck,
+                full_changelog=full_changelog,
+                journal=journal,
+                refresh=True,
+            )
+    return counts
+
+
+def verify_archive(
+    storage: str = str(ISSUE_STORAGE), projects: Union[list[str], None] = None, workers: int = VERIFY_WORKERS
+) -> dict[str, object]:
+    """Proxy to verify-archive/2 implementation."""
+    return impl_verify_archive(root=storage, projects=projects, workers=workers)
+
+
+def iter_groups(
+    query_string: str,
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    collector: Union[CollectorType, None] = None,
+) -> Iterator[object]:
+    """Proxy to find-groups/1 streaming implementation."""
+    return impl_iter_groups(
+        query_string, api_base_url=api_base_url, api_user=api_user, api_token=api_token, collector=collector
+    )
+
+
+def iter_dashboards(
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = PAGE_CONCURRENCY,
+    collector: Union[CollectorType, None] = None,
+) -> Iterator[object]:
+    """Proxy to search-for-dashboards/0 streaming implementation."""
+    return impl_iter_dashboards(
+        api_base_url=api_base_url, api_user=api_user, api_token=api_token, concurrency=concurrency, collector=collector
+    )
+
+
+def iter_filters(
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = PAGE_CONCURRENCY,
+    collector: Union[CollectorType, None] = None,
+) -> Iterator[object]:
+    """Proxy to search-for-filters/0 streaming implementation."""
+    return impl_iter_filters(
+        api_base_url=api_base_url, api_user=api_user, api_token=api_token, concurrency=concurrency, collector=collector
+    )
+
+
+def iter_priorities(
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = PAGE_CONCURRENCY,
+    collector: Union[CollectorType, None] = None,
+) -> Iterator[object]:
+    """Proxy to search-priorities/0 streaming implementation."""
+    return impl_iter_priorities(
+        api_base_url=api_base_url, api_user=api_user, api_token=api_token, concurrency=concurrency, collector=collector
+    )
+
+
+def iter_users_from_group(
+    group_id_or_name: str,
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = PAGE_CONCURRENCY,
+    collector: Union[CollectorType, None] = None,
+) -> Iterator[object]:
+    """Proxy to get-users-from-group/1 streaming implementation."""
+    return impl_iter_users_from_group(
+        group_id_or_name,
+        api_base_url=api_base_url,
+        api_user=api_user,
+        api_token=api_token,
+        concurrency=concurrency,
+        collector=collector,
+    )
+
+
+def iter_workflows(
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = PAGE_CONCURRENCY,
+    collector: Union[CollectorType, None] = None,
+) -> Iterator[object]:
+    """Proxy to get-workflows-paginated/0 streaming implementation."""
+    return impl_iter_workflows(
+        api_base_url=api_base_url, api_user=api_user, api_token=api_token, concurrency=concurrency, collector=collector
+    )
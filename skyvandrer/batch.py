@@ -0,0 +1,229 @@
+"""Cloud Walker (Norwegian: skyvandrer) - batched issue fetching and freshness probes via JQL key lists."""
+
+import concurrent.futures as cf
+import json
+import os
+from typing import Iterable, Iterator, Union
+
+from requests.auth import HTTPBasicAuth
+
+import skyvandrer.aliases as aliases
+import skyvandrer.changelog as changelog
+import skyvandrer.codec as codec
+import skyvandrer.missing as missing
+import skyvandrer.rest as rest
+import skyvandrer.storage as storage
+from skyvandrer import API_BASE_URL, APP_ENV, ENCODING, ENCODING_ERRORS_POLICY, QueryType, env_flag, log
+from skyvandrer.fetch import (
+    FETCH_WORKERS,
+    ISSUE_API_ROOT,
+    discard_alias_archive,
+    has_data,
+    store_issue,
+    valid_issue_keys,
+    valid_update_timestamp,
+)
+from skyvandrer.sync import SEARCH_URL
+
+BATCH_SIZE = int(os.getenv(f'{APP_ENV}_BATCH_SIZE', '0'))  # zero fetches issue by issue
+PRECHECK = env_flag(f'{APP_ENV}_PRECHECK')
+BATCH_SIZE_MAX = 100  # the search endpoint caps maxResults
+COMMA_SPACE = ', '
+
+
+def chunked(keys: Iterable[str], size: int) -> Iterator[list[str]]:
+    """Yield lists of at most size keys."""
+    chunk: list[str] = []
+    for a_key in keys:
+        chunk.append(a_key)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_key_search(
+    issue_keys: list[str], auth_token: HTTPBasicAuth, fields: str = '*all', expand: str = ''
+) -> Iterator[dict[str, object]]:
+    """Yield the issues of the keys with the fields (and expansions) in as few searches as possible.
+
+    Non-existing keys only produce warnings (validateQuery=warn), are not delivered, and enter the negative cache.
+    """
+    headers = {'Accept': 'application/json'}
+    query: QueryType = {
+        'jql': f'key in ({COMMA_SPACE.join(issue_keys)})',
+        'fields': fields,
+        'validateQuery': 'warn',
+        'startAt': 0,
+        'maxResults': min(len(issue_keys), BATCH_SIZE_MAX),
+    }
+    if expand:
+        query['expand'] = expand
+    while True:
+        data = json.loads(rest.get(SEARCH_URL, headers=headers, params=query, auth=auth_token))  # type: ignore
+        if not has_data(data):
+            raise ValueError(f'batch search failed with ({data.get("errorMessages")})')
+        for message in data.get('warningMessages', []):
+            log.debug(f'batch search warning: {message}')
+            for a_key in issue_keys:
+                if f"'{a_key}'" in message:
+                    missing.missing_keys().remember(a_key)
+        issues = data.get('issues', [])
+        yield from issues
+        query['startAt'] = data.get('startAt', query['startAt']) + len(issues)  # type: ignore
+        if not issues or query['startAt'] >= data.get('total', 0):  # type: ignore
+            break
+
+
+def download_batch(
+    issue_keys: list[str], auth_token: HTTPBasicAuth
+) -> tuple[list[tuple[str, bytes, object]], list[str]]:
+    """Retrieve the issues of the keys with changelog.
+
+    Returns the serialized issues (key, payload, updated) and the requested keys the server did not deliver.
+    """
+    documents = []
+    for issue in iter_key_search(issue_keys, auth_token, expand='changelog'):
+        payload = json.dumps(issue).encode(encoding=ENCODING, errors=ENCODING_ERRORS_POLICY)
+        documents.append((str(issue['key']), payload, valid_update_timestamp(issue)))
+
+    delivered = {a_key.upper() for a_key, _, _ in documents}
+    undelivered = [a_key for a_key in issue_keys if a_key.upper() not in delivered]
+    return documents, undelivered
+
+
+def resolve_moved(
+    issue_keys: list[str],
+    undelivered: list[str],
+    documents: list[tuple[str, bytes, object]],
+    auth_token: HTTPBasicAuth,
+) -> dict[str, str]:
+    """Map the undelivered keys of issues the search delivered under a new key to that key (and record the aliases).
+
+    Searches answer moved issues under their current key only, so if unrequested keys arrived, the undelivered keys
+    (that are not known to be missing) are resolved by a minimal issue request each.
+    """
+    newcomers = {a_key.upper() for a_key, _, _ in documents} - {a_key.upper() for a_key in issue_keys}
+    if not newcomers:
+        return {}
+    candidates = [a_key for a_key in undelivered if not missing.missing_keys().is_known(a_key)]
+    headers = {'Accept': 'application/json'}
+    moved = {}
+    for a_key in candidates:
+        url = f'{API_BASE_URL}{ISSUE_API_ROOT}{a_key}'
+        try:
+            data = json.loads(rest.get(url, headers=headers, params={'fields': 'key'}, auth=auth_token))  # type: ignore
+        except ValueError as err:
+            log.warning(f'failed resolving the possibly moved issue {a_key}: {err}')
+            continue
+        canonical = str(data.get('key', '')) if has_data(data) else ''
+        if canonical.upper() in newcomers:
+            aliases.aliases().remember(a_key, canonical, data.get('id'))
+            moved[a_key] = canonical.upper()
+    return moved
+
+
+def probe_updated(issue_keys: list[str], auth_token: HTTPBasicAuth) -> dict[str, object]:
+    """Map the keys of the existing issues to their server side updated timestamps (fields=updated only)."""
+    issues = iter_key_search(issue_keys, auth_token, 'updated')
+    return {str(issue['key']): valid_update_timestamp(issue) for issue in issues}
+
+
+def is_stale(issue_key: str, updated: object) -> bool:
+    """Report if the server side updated timestamp is newer than the stamp of the stored issue (or none is stored)."""
+    stored = storage.store_for(issue_key).updated(issue_key)
+    return stored is None or updated is None or storage.epoch_of(updated) > stored  # type: ignore
+
+
+def stale_keys(
+    args: Iterable[str],
+    auth_token: HTTPBasicAuth,
+    batch_size: int = BATCH_SIZE_MAX,
+    counts: Union[dict[str, int], None] = None,
+) -> list[str]:
+    """Probe the keys in batches and return those with a server copy newer than the archived one.
+
+    The counts of probed, skipped (unchanged), missing (not delivered), and to be fetched keys are added to counts.
+    """
+    if counts is None:
+        counts = {}
+    for name in ('probed', 'skipped', 'missing', 'fetched'):
+        counts.setdefault(name, 0)
+    stale = []
+    for batch in chunked(valid_issue_keys(args), max(1, min(batch_size, BATCH_SIZE_MAX))):
+        server = probe_updated(batch, auth_token)
+        counts['probed'] += len(batch)
+        counts['missing'] += len(batch) - len(server)
+        for a_key, updated in server.items():
+            if is_stale(a_key, updated):
+                stale.append(a_key)
+            else:
+                counts['skipped'] += 1
+    counts['fetched'] += len(stale)
+    log.info(f'freshness probe {counts}')
+    return stale
+
+
+def fetch_batch(
+    issue_keys: list[str],
+    auth_token: HTTPBasicAuth,
+    codec_spec: str = codec.CODEC_SPEC,
+    full_changelog: bool = changelog.FULL_CHANGELOG,
+) -> int:
+    """Fetch and store the issues of the keys and return the count stored."""
+    documents, undelivered = download_batch(issue_keys, auth_token)
+    if full_changelog:
+        documents = changelog.complete_payloads(documents, auth_token)
+    the_codec = codec.codec_from_spec(codec_spec)
+    for a_key, payload, updated in documents:
+        store_issue(a_key, the_codec.compress(payload), codec_spec, updated)  # type: ignore
+    moved = resolve_moved(issue_keys, undelivered, documents, auth_token)
+    for alias, canonical in moved.items():
+        discard_alias_archive(alias, canonical)
+    undelivered = [a_key for a_key in undelivered if a_key not in moved]
+    if undelivered:
+        log.debug(f'not delivered (non-existing): {COMMA_SPACE.join(undelivered)}')
+    return len(documents)
+
+
+def fetch_issues_batched(
+    args: Iterable[str],
+    auth_token: HTTPBasicAuth,
+    batch_size: int = BATCH_SIZE_MAX,
+    workers: int = FETCH_WORKERS,
+    codec_spec: str = codec.CODEC_SPEC,
+    full_changelog: bool = changelog.FULL_CHANGELOG,
+) -> dict[str, int]:
+    """Fetch the issues in batches of up to batch_size keys (with up to workers batches in flight)."""
+    if not args:
+        raise ValueError(f'nothing to pull in args ({args})?')
+    batch_size = max(1, min(batch_size, BATCH_SIZE_MAX))
+    counts = {'batches': 0, 'stored': 0, 'failed_batches': 0}
+    batches = chunked(valid_issue_keys(args), batch_size)
+    if rest.transport().pool_maxsize < workers:
+        rest.configure(pool_maxsize=workers)
+    with cf.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        in_flight: dict[cf.Future, list[str]] = {}
+        for batch in batches:
+            if len(in_flight) >= 2 * max(1, workers):
+                _harvest(in_flight, counts, cf.FIRST_COMPLETED)
+            in_flight[executor.submit(fetch_batch, batch, auth_token, codec_spec, full_changelog)] = batch
+        _harvest(in_flight, counts, cf.ALL_COMPLETED)
+    log.info(f'batched fetch {counts}')
+    log.info(f'transport stats {rest.transport().stats()}')
+    return counts
+
+
+def _harvest(in_flight: dict[cf.Future, list[str]], counts: dict[str, int], return_when: str) -> None:
+    """Collect finished batches into the counts."""
+    done, _ = cf.wait(in_flight, return_when=return_when)
+    for future in done:
+        batch = in_flight.pop(future)
+        counts['batches'] += 1
+        error: Union[BaseException, None] = future.exception()
+        if error is not None:
+            log.error(f'failed fetching batch {batch[0]} .. {batch[-1]}: {error}')
+            counts['failed_batches'] += 1
+        else:
+            counts['stored'] += future.result()
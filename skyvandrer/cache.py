@@ -0,0 +1,143 @@
+"""Cloud Walker (Norwegian: skyvandrer) - on-disk response cache with conditional revalidation."""
+
+import hashlib
+import json
+import os
+import pathlib
+import threading
+import time
+from typing import Union
+from urllib.parse import urlencode, urlsplit
+
+from skyvandrer import APP_ALIAS, APP_ENV, ENCODING, QueryType, env_flag, log
+
+CACHE_ENABLED = env_flag(f'{APP_ENV}_CACHE')
+CACHE_DIR_ENV = os.getenv(f'{APP_ENV}_CACHE_DIR', '')
+CACHE_DIR = (
+    pathlib.Path(CACHE_DIR_ENV).expanduser().resolve() if CACHE_DIR_ENV else pathlib.Path.home() / '.cache' / APP_ALIAS
+)
+CACHE_MAX_BYTES = int(os.getenv(f'{APP_ENV}_CACHE_MAX_BYTES', str(256 << 20)))
+CACHE_SUFFIX = '.json'
+
+HOUR_SECONDS = 3_600
+DAY_SECONDS = 24 * HOUR_SECONDS
+
+# Seconds an entry is served without asking the server, keyed by URL path suffix.
+# Endpoints not listed here bypass the cache.
+CACHE_TTL_SECONDS = {
+    '/serverInfo': HOUR_SECONDS,
+    '/priority/search': DAY_SECONDS,
+    '/workflow/search': DAY_SECONDS,
+}
+
+
+def ttl_for(url: str) -> Union[int, None]:
+    """Time to live for responses from url (None if the endpoint is not cacheable)."""
+    path = urlsplit(url).path.rstrip('/')
+    for suffix, ttl in CACHE_TTL_SECONDS.items():
+        if path.endswith(suffix):
+            return ttl
+    return None
+
+
+def cache_key(http_verb: str, url: str, params: QueryType, user: str = '') -> str:
+    """Key from method, URL, normalized params, and the requesting user."""
+    normalized = urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    return f'{http_verb.upper()} {url}?{normalized} as {user}'
+
+
+class ResponseCache:
+    """Size bounded (least recently used eviction) store of response bodies and their validators."""
+
+    def __init__(self, folder: pathlib.Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES) -> None:
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'revalidations': 0, 'stores': 0, 'evictions': 0}
+        self._sizes: dict[pathlib.Path, int] = {}
+        self._used: dict[pathlib.Path, float] = {}
+        for path in self.folder.glob(f'*{CACHE_SUFFIX}'):
+            stats = path.stat()
+            self._sizes[path] = stats.st_size
+            self._used[path] = stats.st_mtime
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.folder / f'{hashlib.sha256(key.encode(ENCODING)).hexdigest()}{CACHE_SUFFIX}'
+
+    def lookup(self, key: str) -> Union[dict[str, object], None]:
+        """The stored entry for key (or None)."""
+        path = self._path(key)
+        try:
+            with open(path, 'rt', encoding=ENCODING) as handle:
+                entry = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        if entry.get('key') != key:
+            return None
+        os.utime(path)  # recency survives restarts
+        with self._lock:
+            self._used[path] = time.time()
+        return entry  # type: ignore
+
+    def is_fresh(self, entry: dict[str, object], ttl: int) -> bool:
+        """Report if the entry may be served without revalidation."""
+        return time.time() - entry.get('stored_at', 0) < ttl  # type: ignore
+
+    def validators(self, entry: dict[str, object]) -> dict[str, str]:
+        """Conditional request headers for revalidating the entry."""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers  # type: ignore
+
+    def count(self, counter: str) -> None:
+        """Increment the named counter."""
+        with self._lock:
+            self.counters[counter] += 1
+
+    def store(self, key: str, text: str, headers: dict[str, str]) -> None:
+        """Persist the response body with its validators."""
+        entry = {
+            'key': key,
+            'stored_at': time.time(),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'text': text,
+        }
+        self._write(key, entry)
+        self.count('stores')
+
+    def touch(self, key: str, entry: dict[str, object]) -> None:
+        """Restart the time to live of an entry the server confirmed as unchanged."""
+        entry['stored_at'] = time.time()
+        self._write(key, entry)
+
+    def _write(self, key: str, entry: dict[str, object]) -> None:
+        path = self._path(key)
+        temp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(temp_path, 'wt', encoding=ENCODING) as handle:
+            json.dump(entry, handle)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._sizes[path] = path.stat().st_size
+            self._used[path] = time.time()
+            self._evict()
+
+    def _evict(self) -> None:
+        total = sum(self._sizes.values())
+        for path in sorted(self._used, key=self._used.__getitem__):
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes.pop(path, 0)
+            del self._used[path]
+            path.unlink(missing_ok=True)
+            self.counters['evictions'] += 1
+            log.debug(f'evicted cached response {path.name}')
+
+    def stats(self) -> dict[str, int]:
+        """Counters and current footprint."""
+        with self._lock:
+            return {**self.counters, 'entries': len(self._sizes), 'bytes': sum(self._sizes.values())}
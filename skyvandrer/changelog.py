@@ -0,0 +1,128 @@
+"""Cloud Walker (Norwegian: skyvandrer) - complete issue changelogs beyond the embedded first page."""
+
+import concurrent.futures as cf
+import json
+import os
+import re
+from typing import Iterator, no_type_check
+
+from requests.auth import HTTPBasicAuth
+
+import skyvandrer.rest as rest
+import skyvandrer.storage as storage
+from skyvandrer import API_BASE_URL, APP_ENV, ENCODING, ENCODING_ERRORS_POLICY, QueryType, env_flag, log
+
+CHANGELOG_URL_TEMPLATE = API_BASE_URL + '/rest/api/latest/issue/%s/changelog'
+CHANGELOG_PAGE_SIZE = 100
+FULL_CHANGELOG = env_flag(f'{APP_ENV}_FULL_CHANGELOG')
+CHANGELOG_WORKERS = int(os.getenv(f'{APP_ENV}_CHANGELOG_WORKERS', '4'))  # issues completed concurrently per batch
+
+# The embedded changelog announces maxResults and total ahead of its histories.
+CHANGELOG_PATTERN = re.compile(rb'"changelog"\s*:\s*\{')
+CHANGELOG_HEADER_PROBE_BYTES = 256
+HISTORIES_MEMBER = b'"histories"'
+MAX_RESULTS_PATTERN = re.compile(rb'"maxResults"\s*:\s*(\d+)')
+TOTAL_PATTERN = re.compile(rb'"total"\s*:\s*(\d+)')
+
+
+@no_type_check
+def histories_of(issue: dict[str, object]) -> list[dict[str, object]]:
+    """The history entries held in the issue document."""
+    return (issue.get('changelog') or {}).get('histories') or []
+
+
+@no_type_check
+def is_truncated(issue: dict[str, object]) -> bool:
+    """Report if the issue document holds fewer history entries than the changelog total."""
+    changelog = issue.get('changelog') or {}
+    return changelog.get('total', 0) > len(changelog.get('histories') or [])
+
+
+def payload_may_be_truncated(payload: bytes) -> bool:
+    """Cheap check of the serialized issue if the embedded changelog may be truncated (without parsing it).
+
+    Documents without an embedded changelog are complete, while headers that cannot be read count as truncated.
+    """
+    start = CHANGELOG_PATTERN.search(payload)
+    if start is None:
+        return False
+    header = payload[start.end() : start.end() + CHANGELOG_HEADER_PROBE_BYTES]
+    header = header.partition(HISTORIES_MEMBER)[0]
+    max_results, total = MAX_RESULTS_PATTERN.search(header), TOTAL_PATTERN.search(header)
+    if max_results is None or total is None:
+        return True
+    return int(total.group(1)) > int(max_results.group(1))
+
+
+def iter_changelog(issue_key: str, auth_token: HTTPBasicAuth, start_at: int = 0) -> Iterator[dict[str, object]]:
+    """Yield the history entries of the issue (oldest first) from the changelog endpoint starting at start_at."""
+    url = CHANGELOG_URL_TEMPLATE % (issue_key,)
+    headers = {'Accept': 'application/json'}
+    query: QueryType = {'startAt': start_at, 'maxResults': CHANGELOG_PAGE_SIZE}
+    while True:
+        data = json.loads(rest.get(url, headers=headers, params=query, auth=auth_token))  # type: ignore
+        error_messages = data.get('errorMessages', [])
+        if error_messages:
+            raise ValueError(f'changelog of ({issue_key}) failed with ({error_messages})')
+        values = data.get('values', [])
+        yield from values
+        query['startAt'] = data.get('startAt', query['startAt']) + len(values)  # type: ignore
+        if not values or data.get('isLast', False) or query['startAt'] >= data.get('total', 0):  # type: ignore
+            break
+
+
+@no_type_check
+def merge_histories(*sources: list[dict[str, object]]) -> list[dict[str, object]]:
+    """Union of the history entries by id in id (i.e. creation) order."""
+    merged = {}
+    for histories in sources:
+        for entry in histories:
+            merged[str(entry['id'])] = entry
+    return [merged[an_id] for an_id in sorted(merged, key=int)]
+
+
+@no_type_check
+def complete_issue(issue_key: str, issue: dict[str, object], auth_token: HTTPBasicAuth) -> bool:
+    """Complete the truncated changelog of the issue in place and report if anything changed.
+
+    If the archived record holds a complete changelog only the entries after its last one are requested.
+    """
+    if not is_truncated(issue):
+        return False
+    known = []
+    stored_payload = storage.read_document(issue_key)
+    if stored_payload is not None:
+        stored = json.loads(stored_payload)
+        if not is_truncated(stored):
+            known = histories_of(stored)
+    fetched = list(iter_changelog(issue_key, auth_token, start_at=len(known)))
+    histories = merge_histories(known, histories_of(issue), fetched)
+    issue['changelog'] = {'startAt': 0, 'maxResults': len(histories), 'total': len(histories), 'histories': histories}
+    log.debug(f'{issue_key} changelog completed with {len(fetched)} fetched after {len(known)} archived entries')
+    return True
+
+
+def complete_payload(issue_key: str, payload: bytes, auth_token: HTTPBasicAuth) -> bytes:
+    """The serialized issue with the complete changelog (the payload itself if the embedded one is complete)."""
+    if not payload_may_be_truncated(payload):
+        return payload
+    issue = json.loads(payload)
+    if not complete_issue(issue_key, issue, auth_token):
+        return payload
+    return json.dumps(issue).encode(encoding=ENCODING, errors=ENCODING_ERRORS_POLICY)
+
+
+def complete_payloads(
+    documents: list[tuple[str, bytes, object]], auth_token: HTTPBasicAuth, workers: int = CHANGELOG_WORKERS
+) -> list[tuple[str, bytes, object]]:
+    """Complete the changelogs of the serialized issues (key, payload, updated) with up to workers in flight."""
+
+    def complete(document: tuple[str, bytes, object]) -> tuple[str, bytes, object]:
+        a_key, payload, updated = document
+        return a_key, complete_payload(a_key, payload, auth_token), updated
+
+    if workers <= 1 or len(documents) <= 1:
+        return [complete(document) for document in documents]
+    with cf.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(complete, documents))
+
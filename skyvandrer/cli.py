@@ -2,10 +2,10 @@
 
 import json
 import sys
-from typing import Union
+from typing import Mapping, Union
 
 import skyvandrer.rest as rest
-from skyvandrer import APP_ALIAS, NL, CollectorType, log
+from skyvandrer import APP_ALIAS, ISSUE_STORAGE, NL, log
 import skyvandrer.api as api
 
 
@@ -18,8 +18,15 @@ ARITY_ZERO = {
     'search-priorities': api.search_priorities,
 }
 
+PAGINATED = (
+    'get-workflows-paginated',
+    'search-for-dashboards',
+    'search-for-filters',
+    'search-priorities',
+)
 
-def log_collector(collector: CollectorType) -> None:
+
+def log_collector(collector: Mapping[str, object]) -> None:
     """DRY."""
     for line in json.dumps(collector, sort_keys=False, indent=4, separators=(',', ': ')).split(NL):
         log.info(line)
@@ -32,6 +39,51 @@ def reduce_args(args: list[str], task: str) -> list[str]:
     return args
 
 
+def extract_option(args: list[str], option: str) -> tuple[list[str], Union[str, None]]:
+    """Remove the option (as --option=value or --option value) from the arguments list and return its value."""
+    value = None
+    remaining = []
+    pending = False
+    for arg in args:
+        if pending:
+            value, pending = arg, False
+        elif arg == option:
+            pending = True
+        elif arg.startswith(f'{option}='):
+            value = arg.split('=', 1)[1]
+        else:
+            remaining.append(arg)
+    if pending:
+        raise ValueError(f'missing value for option {option}')
+    return remaining, value
+
+
+def fetch_options(args: list[str]) -> tuple[list[str], dict[str, Union[bool, int, str]]]:
+    """Remove the issue fetching options from the arguments list and return them as keyword arguments."""
+    args, workers = extract_option(args, '--workers')
+    args, compressors = extract_option(args, '--compressors')
+    args, codec_spec = extract_option(args, '--codec')
+    args, batch_size = extract_option(args, '--batch-size')
+    args, journal = extract_option(args, '--journal')
+    passthrough = '--passthrough' in args
+    args = reduce_args(args, '--passthrough')
+    precheck = '--precheck' in args
+    args = reduce_args(args, '--precheck')
+    full_changelog = '--full-changelog' in args
+    args = reduce_args(args, '--full-changelog')
+    options: dict[str, Union[bool, int, str]] = {
+        'workers': int(workers) if workers else api.FETCH_WORKERS,
+        'passthrough': passthrough or api.PASSTHROUGH,
+        'compressors': int(compressors) if compressors else api.COMPRESS_WORKERS,
+        'codec_spec': codec_spec or api.CODEC_SPEC,
+        'batch_size': int(batch_size) if batch_size else api.BATCH_SIZE,
+        'precheck': precheck or api.PRECHECK,
+        'full_changelog': full_changelog or api.FULL_CHANGELOG,
+        'journal': journal or api.JOURNAL,
+    }
+    return args, options
+
+
 def app(args: Union[None, list[str]], prog_name: str = APP_ALIAS) -> int:
     """DRY."""
     if args is None:
@@ -50,15 +102,132 @@ def app(args: Union[None, list[str]], prog_name: str = APP_ALIAS) -> int:
         log_collector(api.find_groups(query_string))
         return 0
 
+    task = 'get-users-from-group'
+    if task in args:
+        args = reduce_args(args, task)
+        try:
+            group_id_or_name = args[0]
+        except IndexError as err:
+            message = 'missing group id or name'
+            log.fatal(message)
+            raise Exception(message) from err
+
+        log_collector(api.get_users_from_group(group_id_or_name))
+        return 0
+
     for task, action in ARITY_ZERO.items():
         if task in args:
+            if task in PAGINATED:
+                args, concurrency = extract_option(args, '--concurrency')
+                if concurrency:
+                    log_collector(action(concurrency=int(concurrency)))  # type: ignore
+                    log.info(f'rest stats {rest.stats()}')
+                    return 0
             log_collector(action())
+            log.info(f'rest stats {rest.stats()}')
             return 0
 
+    task = 'benchmark-codecs'
+    if task in args:
+        args = reduce_args(args, task)
+        args, sample_size = extract_option(args, '--sample')
+        args, storage = extract_option(args, '--storage')
+        log_collector(
+            api.benchmark_codecs(
+                tuple(args) or None,
+                storage=storage or str(ISSUE_STORAGE),
+                sample_size=int(sample_size) if sample_size else 200,
+            )
+        )
+        return 0
+
+    task = 'benchmark-inventory'
+    if task in args:
+        args = reduce_args(args, task)
+        args, file_count = extract_option(args, '--files')
+        args, workers = extract_option(args, '--workers')
+        log_collector(
+            api.benchmark_inventory(int(file_count) if file_count else 3000, workers=int(workers) if workers else 0)
+        )
+        return 0
+
+    task = 'inventory'
+    if task in args:
+        args = reduce_args(args, task)
+        args, storage = extract_option(args, '--storage')
+        args, folder = extract_option(args, '--output')
+        args, workers = extract_option(args, '--workers')
+        force = '--rehash' in args
+        args = reduce_args(args, '--rehash')
+        log_collector(
+            api.inventize_storage(
+                storage=storage or str(ISSUE_STORAGE),
+                folder=folder or str(api.INVENTORY_FOLDER),
+                projects=args or None,
+                workers=int(workers) if workers else api.INVENTORY_PROJECT_WORKERS,
+                force=force,
+            )
+        )
+        return 0
+
+    task = 'extract-columns'
+    if task in args:
+        args = reduce_args(args, task)
+        args, storage = extract_option(args, '--storage')
+        args, folder = extract_option(args, '--output')
+        args, workers = extract_option(args, '--workers')
+        force = '--rebuild' in args
+        args = reduce_args(args, '--rebuild')
+        log_collector(
+            api.extract_columns(
+                storage=storage or str(ISSUE_STORAGE),
+                folder=folder or str(api.COLUMNS_FOLDER),
+                projects=args or None,
+                workers=int(workers) if workers else api.COLUMN_WORKERS,
+                force=force,
+            )
+        )
+        return 0
+
+    task = 'verify-archive'
+    if task in args:
+        args = reduce_args(args, task)
+        args, storage = extract_option(args, '--storage')
+        args, workers = extract_option(args, '--workers')
+        report = api.verify_archive(
+            storage=storage or str(ISSUE_STORAGE),
+            projects=args or None,
+            workers=int(workers) if workers else api.VERIFY_WORKERS,
+        )
+        log_collector(report)
+        return 0 if not report['problems'] else 1
+
+    task = 'migrate-to-packs'
+    if task in args:
+        args = reduce_args(args, task)
+        args, storage = extract_option(args, '--storage')
+        log_collector(api.migrate_to_packs(storage=storage or str(ISSUE_STORAGE), projects=args or None))
+        return 0
+
     task = 'fetch-issues'
     if task in args:
         args = reduce_args(args, task)
-        api.fetch_issues(args, rest.auth())
+        args, options = fetch_options(args)
+        api.fetch_issues(args, rest.auth(), **options)  # type: ignore
+        return 0
+
+    task = 'sync-issues'
+    if task in args:
+        args = reduce_args(args, task)
+        args, options = fetch_options(args)
+        args, overlap_minutes = extract_option(args, '--overlap-minutes')
+        if not args:
+            message = 'missing project code(s)'
+            log.fatal(message)
+            raise Exception(message)
+        if overlap_minutes:
+            options['overlap_minutes'] = int(overlap_minutes)
+        log_collector(api.sync_issues(args, rest.auth(), **options))  # type: ignore
         return 0
 
     return 1
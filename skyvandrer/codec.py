@@ -0,0 +1,238 @@
+"""Cloud Walker (Norwegian: skyvandrer) - archive codecs (xz, zstd, none) and a codec benchmark."""
+
+import lzma
+import os
+import pathlib
+import random
+import time
+from typing import BinaryIO, Iterator, Union
+
+from skyvandrer import APP_ENV, DASH, ISSUE_STORAGE, log
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+PathlikeType = Union[str, pathlib.Path]
+
+DEFAULT_CODEC_SPEC = 'xz-7e'  # LZMA2 preset 7 extreme - the historic archive format
+CODEC_SPEC = os.getenv(f'{APP_ENV}_CODEC', DEFAULT_CODEC_SPEC)
+DOC_EXT = '.json'
+STREAM_CHUNK_BYTES = 1 << 20
+ZSTD_READ_BYTES = 1 << 16  # compressed input per step (the output of a step is not bounded otherwise)
+EXTREME = 'e'
+
+
+class Codec:
+    """Compression of serialized documents identified by the file suffix."""
+
+    name = 'none'
+    ext = ''
+
+    def __init__(self, level: Union[int, None] = None, extreme: bool = False) -> None:
+        self.level = level
+        self.extreme = extreme
+
+    @property
+    def spec(self) -> str:
+        """Textual form (name[-level[e]]) parsed by codec_from_spec."""
+        if self.level is None:
+            return self.name
+        return f'{self.name}{DASH}{self.level}{EXTREME if self.extreme else ""}'
+
+    @property
+    def suffix(self) -> str:
+        """Complete file suffix of archives written by the codec."""
+        return f'{DOC_EXT}{self.ext}'
+
+    def compress(self, payload: bytes) -> bytes:
+        """Compress the serialized document."""
+        return payload
+
+    def decompress(self, blob: bytes) -> bytes:
+        """Restore the serialized document."""
+        return blob
+
+    def iter_document(self, handle: BinaryIO, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        """Yield the serialized document restored from the compressed stream handle in chunks."""
+        while chunk := handle.read(chunk_size):
+            yield chunk
+
+
+class XzCodec(Codec):
+    """LZMA2 in the xz container with SHA256 integrity check."""
+
+    name = 'xz'
+    ext = '.xz'
+
+    def __init__(self, level: Union[int, None] = 7, extreme: bool = True) -> None:
+        super().__init__(7 if level is None else level, extreme)
+
+    @property
+    def filters(self) -> list[dict[str, int]]:
+        """LZMA filter chain for the preset."""
+        preset = self.level | (lzma.PRESET_EXTREME if self.extreme else 0)  # type: ignore
+        return [{'id': lzma.FILTER_LZMA2, 'preset': preset}]
+
+    def compress(self, payload: bytes) -> bytes:
+        """Compress the serialized document."""
+        return lzma.compress(payload, check=lzma.CHECK_SHA256, filters=self.filters)
+
+    def decompress(self, blob: bytes) -> bytes:
+        """Restore the serialized document."""
+        return lzma.decompress(blob)
+
+    def iter_document(self, handle: BinaryIO, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        """Yield the document in chunks (the integrity check is verified at the end, truncation raises EOFError)."""
+        with lzma.open(handle, 'rb') as reader:
+            while chunk := reader.read(chunk_size):
+                yield chunk
+
+
+class ZstdCodec(Codec):
+    """Zstandard frames with content checksum (requires the zstandard package)."""
+
+    name = 'zstd'
+    ext = '.zst'
+
+    def __init__(self, level: Union[int, None] = 19, extreme: bool = False) -> None:
+        if zstandard is None:
+            raise RuntimeError('the zstd codec requires the zstandard package')
+        super().__init__(19 if level is None else level, False)
+
+    def compress(self, payload: bytes) -> bytes:
+        """Compress the serialized document."""
+        return zstandard.ZstdCompressor(level=self.level, write_checksum=True).compress(payload)  # type: ignore
+
+    def decompress(self, blob: bytes) -> bytes:
+        """Restore the serialized document."""
+        return zstandard.ZstdDecompressor().decompress(blob)  # type: ignore
+
+    def iter_document(self, handle: BinaryIO, chunk_size: int = STREAM_CHUNK_BYTES) -> Iterator[bytes]:
+        """Yield the document in chunks (the checksum is verified at the end, truncation raises EOFError)."""
+        decompressor = zstandard.ZstdDecompressor().decompressobj()  # type: ignore
+        while compressed := handle.read(min(chunk_size, ZSTD_READ_BYTES)):
+            if chunk := decompressor.decompress(compressed):
+                yield chunk
+        if not decompressor.eof:
+            raise EOFError('zstd frame ended before its end was reached')
+
+
+CODECS = {codec.name: codec for codec in (Codec, XzCodec, ZstdCodec)}
+EXT_TO_CODEC = {codec.ext: codec for codec in (XzCodec, ZstdCodec)}
+
+
+def codec_from_spec(spec: str = CODEC_SPEC) -> Codec:
+    """Parse name[-level[e]] (e.g. xz-7e, zstd-19, none) into a codec."""
+    name, _, level_text = spec.strip().lower().partition(DASH)
+    if name not in CODECS:
+        raise KeyError(f'Unsupported codec requested - {name} is not in {tuple(CODECS.keys())}')
+    if not level_text:
+        return CODECS[name]()
+    extreme = level_text.endswith(EXTREME)
+    return CODECS[name](int(level_text.rstrip(EXTREME)), extreme)
+
+
+def codec_for_path(path: PathlikeType) -> Codec:
+    """The codec that wrote the archive at path (by its final suffix)."""
+    suffix = pathlib.Path(path).suffix
+    if suffix in EXT_TO_CODEC:
+        return EXT_TO_CODEC[suffix]()
+    if suffix == DOC_EXT:
+        return Codec()
+    raise ValueError(f'not an issue archive ({path})')
+
+
+def is_archive(path: PathlikeType) -> bool:
+    """Report if the path carries one of the archive suffixes and an issue key stem (e.g. not notes.json)."""
+    name = pathlib.Path(path).name
+    if not name.endswith(DOC_EXT) and not any(name.endswith(f'{DOC_EXT}{ext}') for ext in EXT_TO_CODEC):
+        return False
+    project, dash, serial = archive_stem(name).partition(DASH)
+    return bool(dash and project and serial) and project.replace('_', '').isalnum() and serial.isdigit()
+
+
+def archive_stem(path: PathlikeType) -> str:
+    """The file name without the archive suffixes (i.e. the lower case issue key)."""
+    name = pathlib.Path(path).name
+    for ext in EXT_TO_CODEC:
+        if name.endswith(f'{DOC_EXT}{ext}'):
+            return name[: -len(f'{DOC_EXT}{ext}')]
+    return name[: -len(DOC_EXT)] if name.endswith(DOC_EXT) else name
+
+
+def archive_candidates(folder: PathlikeType, stem: str) -> list[pathlib.Path]:
+    """Paths the archive of stem may have in folder, one per codec."""
+    return [pathlib.Path(folder, f'{stem}{DOC_EXT}{ext}') for ext in (*EXT_TO_CODEC, '')]
+
+
+def find_archive(folder: PathlikeType, stem: str) -> Union[pathlib.Path, None]:
+    """Most recently modified archive of stem in folder whatever the codec (or None)."""
+    found = [path for path in archive_candidates(folder, stem) if path.is_file()]
+    return max(found, key=lambda path: path.stat().st_mtime) if found else None
+
+
+def discard_other_archives(path: PathlikeType) -> None:
+    """Remove archives of the same document written by other codecs."""
+    a_path = pathlib.Path(path)
+    for candidate in archive_candidates(a_path.parent, archive_stem(a_path)):
+        if candidate != a_path:
+            candidate.unlink(missing_ok=True)
+
+
+def read_document(path: PathlikeType) -> bytes:
+    """The serialized document of the archive at path."""
+    with open(path, 'rb') as handle:
+        return codec_for_path(path).decompress(handle.read())
+
+
+def write_document(payload: bytes, path: PathlikeType, codec: Codec) -> pathlib.Path:
+    """Write the serialized document with codec next to path (adjusting the suffix) and return the path."""
+    a_path = pathlib.Path(path)
+    target = a_path.with_name(f'{archive_stem(a_path)}{codec.suffix}')
+    with open(target, 'wb') as handle:
+        handle.write(codec.compress(payload))
+    return target
+
+
+def benchmark(
+    specs: tuple[str, ...] = ('none', 'xz-1', 'xz-6', 'xz-7e', 'xz-9e', 'zstd-3', 'zstd-9', 'zstd-19'),
+    storage: PathlikeType = ISSUE_STORAGE,
+    sample_size: int = 200,
+    seed: Union[int, None] = None,
+) -> dict[str, dict[str, float]]:
+    """Compare codecs on a random sample of the archived issues.
+
+    Reports compress and decompress throughput (MB/s of serialized documents) and the compression ratio.
+    """
+    paths = [path for path in pathlib.Path(storage).rglob(f'*{DOC_EXT}*') if path.is_file() and is_archive(path)]
+    if not paths:
+        raise ValueError(f'no archives found below ({storage})')
+    random.Random(seed).shuffle(paths)
+    documents = [read_document(path) for path in paths[:sample_size]]
+    raw_bytes = sum(len(doc) for doc in documents)
+    log.info(f'benchmarking codecs on {len(documents)} documents ({raw_bytes / 1e6 :.3f} MB) from ({storage})')
+
+    results = {}
+    for spec in specs:
+        try:
+            codec = codec_from_spec(spec)
+        except RuntimeError as err:
+            log.warning(f'skipping codec {spec}: {err}')
+            continue
+        start = time.perf_counter()
+        blobs = [codec.compress(doc) for doc in documents]
+        compress_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        for blob in blobs:
+            codec.decompress(blob)
+        decompress_seconds = time.perf_counter() - start
+        packed_bytes = sum(len(blob) for blob in blobs)
+        results[codec.spec] = {
+            'compress_mb_per_second': raw_bytes / 1e6 / compress_seconds if compress_seconds else 0.0,
+            'decompress_mb_per_second': raw_bytes / 1e6 / decompress_seconds if decompress_seconds else 0.0,
+            'ratio': raw_bytes / packed_bytes if packed_bytes else 0.0,
+            'packed_megabytes': packed_bytes / 1e6,
+        }
+    return results
@@ -0,0 +1,258 @@
+"""Cloud Walker (Norwegian: skyvandrer) - columnar issue tables extracted from the archive for vectorized analytics."""
+
+import concurrent.futures as cf
+import datetime as dti
+import json
+import os
+import pathlib
+import time
+from typing import Union
+
+import skyvandrer.codec as codec
+import skyvandrer.storage as storage
+from skyvandrer import APP_ENV, ISSUE_STORAGE, log, parse_timestamp
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+PathlikeType = Union[str, pathlib.Path]
+# (key, file path or pack folder, pack key or None, archive mtime or recorded updated)
+ExtractTaskType = tuple[str, str, Union[str, None], float]
+
+COLUMNS_FOLDER = pathlib.Path(os.getenv(f'{APP_ENV}_COLUMNS_FOLDER', 'columns'))
+COLUMN_WORKERS = int(os.getenv(f'{APP_ENV}_COLUMN_WORKERS', str(os.cpu_count() or 4)))
+CUSTOM_FIELDS = tuple(field for field in os.getenv(f'{APP_ENV}_COLUMN_CUSTOM_FIELDS', '').split(',') if field)
+TABLE_EXT = '.npz'
+
+CATEGORICAL = ('project', 'issuetype', 'status', 'priority', 'assignee', 'resolution')
+TIMESTAMPS = ('created', 'updated', 'resolutiondate')
+NOT_A_TIME = -(2**63)  # NaT as int64
+EPOCH = dti.datetime(1970, 1, 1)
+MULTI_SEP = '|'
+
+
+def is_available() -> bool:
+    """Report if tables can be built (requires the numpy package)."""
+    return np is not None
+
+
+def _label(value: object) -> str:
+    """Text of a field value (named objects by name, options by value, lists joined)."""
+    if value is None:
+        return ''
+    if isinstance(value, dict):
+        for member in ('key', 'name', 'value', 'displayName', 'accountId', 'id'):
+            if member in value:
+                return str(value[member])
+        return json.dumps(value, sort_keys=True)
+    if isinstance(value, list):
+        return MULTI_SEP.join(_label(item) for item in value)
+    return str(value)
+
+
+def _millis(text_stamp: Union[str, None]) -> int:
+    """Epoch milliseconds of the REST timestamp (NaT if missing or unparsable)."""
+    if not text_stamp:
+        return NOT_A_TIME
+    try:
+        stamp = parse_timestamp(text_stamp)
+    except (AssertionError, ValueError):
+        return NOT_A_TIME
+    return NOT_A_TIME if stamp is None else int((stamp - EPOCH).total_seconds() * 1000)  # type: ignore
+
+
+def extract_row(document: bytes, custom_fields: tuple[str, ...] = CUSTOM_FIELDS) -> dict[str, object]:
+    """The core (and custom) field values of the serialized issue."""
+    issue = json.loads(document)
+    fields = issue.get('fields') or {}
+    row: dict[str, object] = {
+        'key': issue.get('key', ''),
+        'id': int(issue.get('id') or -1),
+        'project': _label(fields.get('project')),
+        'issuetype': _label(fields.get('issuetype')),
+        'status': _label(fields.get('status')),
+        'priority': _label(fields.get('priority')),
+        'assignee': _label(fields.get('assignee')),
+        'resolution': _label(fields.get('resolution')),
+    }
+    for name in TIMESTAMPS:
+        row[name] = _millis(fields.get(name))
+    for name in custom_fields:
+        row[name] = _label(fields.get(name))
+    return row
+
+
+def extract_task(task: ExtractTaskType, custom_fields: tuple[str, ...] = CUSTOM_FIELDS) -> dict[str, object]:
+    """Read and extract one archive file or pack entry (runs in the worker processes)."""
+    a_key, location, pack_key, mtime = task
+    if pack_key is None:
+        document = codec.read_document(location)
+    else:
+        folder = pathlib.Path(location)
+        document = storage.open_store(folder.name, root=folder.parent).get(pack_key)  # type: ignore
+    row = extract_row(document, custom_fields)
+    row['archive_key'] = a_key
+    row['archive_mtime'] = mtime
+    return row
+
+
+def try_extract_task(
+    task: ExtractTaskType, custom_fields: tuple[str, ...] = CUSTOM_FIELDS
+) -> tuple[Union[dict[str, object], None], str]:
+    """The row of the task or None and the reason it could not be read (runs in the worker processes)."""
+    try:
+        return extract_task(task, custom_fields), ''
+    except Exception as err:  # noqa - corrupt, truncated, or non issue archives are skipped (not fatal)
+        return None, f'{type(err).__name__}: {err}'
+
+
+def project_tasks(folder: PathlikeType) -> list[ExtractTaskType]:
+    """The archive files or pack entries of the project folder with their modification stamps."""
+    a_folder = pathlib.Path(folder)
+    if storage.is_pack_folder(a_folder):
+        entries = storage.open_store(a_folder.name, root=a_folder.parent).entries()
+        return [(entry.key.upper(), str(a_folder), entry.key, entry.updated) for entry in entries]
+    tasks = []
+    with os.scandir(a_folder) as scanner:
+        for item in scanner:
+            if item.is_file() and codec.is_archive(item.name):
+                tasks.append((codec.archive_stem(item.name).upper(), item.path, None, item.stat().st_mtime))
+    return sorted(tasks)
+
+
+def build_table(rows: list[dict[str, object]], custom_fields: tuple[str, ...] = CUSTOM_FIELDS) -> dict[str, object]:
+    """Columnar arrays of the rows (categorical text as int32 codes plus categories, timestamps as datetime64)."""
+    if np is None:
+        raise RuntimeError('the columnar tables require the numpy package')
+    table: dict[str, object] = {
+        'key': np.array([row['key'] for row in rows], dtype=str),
+        'id': np.array([row['id'] for row in rows], dtype=np.int64),
+        'archive_key': np.array([row['archive_key'] for row in rows], dtype=str),
+        'archive_mtime': np.array([row['archive_mtime'] for row in rows], dtype=np.float64),
+    }
+    for name in TIMESTAMPS:
+        table[name] = np.array([row[name] for row in rows], dtype=np.int64).view('datetime64[ms]')
+    for name in (*CATEGORICAL, *custom_fields):
+        texts = np.array([str(row.get(name, '')) for row in rows], dtype=str)
+        categories, codes = np.unique(texts, return_inverse=True)
+        table[f'{name}_categories'] = categories
+        table[f'{name}_codes'] = codes.astype(np.int32)
+    return table
+
+
+def table_rows(table: dict[str, object], custom_fields: tuple[str, ...] = CUSTOM_FIELDS) -> list[dict[str, object]]:
+    """The rows of a table (inverse of build_table - used to reuse unchanged rows on incremental rebuilds)."""
+    count = len(table['key'])  # type: ignore
+    columns: dict[str, list[object]] = {
+        'key': table['key'].tolist(),  # type: ignore
+        'id': table['id'].tolist(),  # type: ignore
+        'archive_key': table['archive_key'].tolist(),  # type: ignore
+        'archive_mtime': table['archive_mtime'].tolist(),  # type: ignore
+    }
+    for name in TIMESTAMPS:
+        columns[name] = table[name].view(np.int64).tolist()  # type: ignore
+    for name in (*CATEGORICAL, *custom_fields):
+        if f'{name}_codes' in table:
+            columns[name] = decode(table, name).tolist()  # type: ignore
+        else:
+            columns[name] = [''] * count
+    return [{name: values[slot] for name, values in columns.items()} for slot in range(count)]
+
+
+def decode(table: dict[str, object], name: str) -> object:
+    """The text values of the categorical column name (per row)."""
+    return table[f'{name}_categories'][table[f'{name}_codes']]  # type: ignore
+
+
+def count_by(table: dict[str, object], name: str) -> dict[str, int]:
+    """Row counts per category of the categorical column name (vectorized - no per row Python work)."""
+    if np is None:
+        raise RuntimeError('the columnar tables require the numpy package')
+    categories = table[f'{name}_categories']
+    counts = np.bincount(table[f'{name}_codes'], minlength=len(categories))  # type: ignore
+    return dict(zip(categories.tolist(), counts.tolist()))  # type: ignore
+
+
+def load_table(path: PathlikeType) -> dict[str, object]:
+    """The arrays of a table file."""
+    if np is None:
+        raise RuntimeError('the columnar tables require the numpy package')
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def save_table(table: dict[str, object], path: PathlikeType) -> None:
+    """Write the table arrays (uncompressed for fast loading) and replace the file atomically."""
+    a_path = pathlib.Path(path)
+    a_path.parent.mkdir(parents=True, exist_ok=True)
+    partial = a_path.with_name(f'{a_path.stem}.partial{TABLE_EXT}')
+    np.savez(partial, **table)  # type: ignore
+    os.replace(partial, a_path)
+
+
+def extract_project(
+    project: str,
+    root: PathlikeType = ISSUE_STORAGE,
+    folder: PathlikeType = COLUMNS_FOLDER,
+    executor: Union[cf.Executor, None] = None,
+    custom_fields: tuple[str, ...] = CUSTOM_FIELDS,
+    force: bool = False,
+) -> dict[str, int]:
+    """Build or update the table of the project and return the counts of rows, extracted, reused, and skipped rows.
+
+    Rows of archives whose modification stamp did not change since the last build are reused unless forced.
+    Archives that cannot be read (corrupt, truncated, not an issue) are logged and skipped.
+    """
+    if np is None:
+        raise RuntimeError('the columnar tables require the numpy package')
+    tasks = project_tasks(pathlib.Path(root, project.lower()))
+    path = pathlib.Path(folder, f'{project.lower()}{TABLE_EXT}')
+    previous = {}
+    if path.is_file() and not force:
+        previous = {row['archive_key']: row for row in table_rows(load_table(path), custom_fields)}
+    reused, stale = [], []
+    for task in tasks:
+        known = previous.get(task[0])
+        if known is not None and known['archive_mtime'] == task[3]:
+            reused.append(known)
+        else:
+            stale.append(task)
+    if executor is None or len(stale) <= 1:
+        outcomes = [try_extract_task(task, custom_fields) for task in stale]
+    else:
+        chunksize = max(1, min(256, len(stale) // 32))
+        outcomes = list(executor.map(try_extract_task, stale, [custom_fields] * len(stale), chunksize=chunksize))
+    extracted, skipped = [], 0
+    for task, (row, error) in zip(stale, outcomes):
+        if row is None:
+            log.warning(f'skipping unreadable archive {task[0]} at ({task[1]}): {error}')
+            skipped += 1
+        else:
+            extracted.append(row)
+    rows = sorted(reused + extracted, key=lambda row: row['archive_key'])  # type: ignore
+    if rows or path.is_file():
+        save_table(build_table(rows, custom_fields), path)
+    return {'rows': len(rows), 'extracted': len(extracted), 'reused': len(reused), 'skipped': skipped}
+
+
+def extract_columns(
+    root: PathlikeType = ISSUE_STORAGE,
+    folder: PathlikeType = COLUMNS_FOLDER,
+    projects: Union[list[str], None] = None,
+    workers: int = COLUMN_WORKERS,
+    custom_fields: tuple[str, ...] = CUSTOM_FIELDS,
+    force: bool = False,
+) -> dict[str, dict[str, int]]:
+    """Build or update the tables of all (or the given) projects below root with extraction on a process pool."""
+    if not projects:
+        with os.scandir(root) as scanner:
+            projects = sorted(item.name for item in scanner if item.is_dir())
+    start = time.monotonic()
+    summary = {}
+    with cf.ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        for project in projects:
+            summary[project.upper()] = extract_project(project, root, folder, executor, custom_fields, force)
+    log.info(f'extracted columns of {len(summary)} projects into ({folder}) in {time.monotonic() - start :.3f} secs')
+    return summary
@@ -1,31 +1,64 @@
 """Fetch a thing or two from the nineties."""
 
+import concurrent.futures as cf
 import datetime as dti
 import json
-import lzma
 import os
-import pathlib
 import random
+import re
 import time
-from typing import Union, no_type_check
+from typing import Iterable, Iterator, Union, no_type_check
 
-import requests
 from requests.auth import HTTPBasicAuth
 
-from skyvandrer import API_BASE_URL, DASH, DEBUG, ENCODING, ENCODING_ERRORS_POLICY, ISSUE_STORAGE, log, parse_timestamp
+import skyvandrer.aliases as aliases
+import skyvandrer.changelog as changelog
+import skyvandrer.codec as codec
+import skyvandrer.missing as missing
+import skyvandrer.rest as rest
+import skyvandrer.storage as storage
+from skyvandrer import (
+    API_BASE_URL,
+    APP_ENV,
+    DASH,
+    DEBUG,
+    ENCODING,
+    ENCODING_ERRORS_POLICY,
+    env_flag,
+    log,
+    parse_timestamp,
+)
 
 ISSUE_API_ROOT = '/rest/api/latest/issue/'
 ISSUE_ACTION = '?expand=changelog'
 ISSUE_URL_TEMPLATE = API_BASE_URL + ISSUE_API_ROOT + "%s" + ISSUE_ACTION
 
-XZ_FILTERS = [{'id': lzma.FILTER_LZMA2, 'preset': 7 | lzma.PRESET_EXTREME}]
-XZ_EXT = '.xz'
-
-WAIT_MAX_MILLIS = 1.0e3
+WAIT_MAX_MILLIS = float(os.getenv(f'{APP_ENV}_WAIT_MAX_MILLIS', '0'))  # random jitter, pacing is up to the limiter
+FETCH_WORKERS = int(os.getenv(f'{APP_ENV}_FETCH_WORKERS', '1'))
+PASSTHROUGH = env_flag(f'{APP_ENV}_PASSTHROUGH')
 
 # Non-existing ticket:
 # {"errorMessages":["Issue Does Not Exist"],"errors":{}}
 CHECK = 'errorMessages'
+CHECK_PROBE = f'"{CHECK}"'.encode(ENCODING)
+PROBE_BYTES = 64  # error documents announce themselves right at the start
+HTTP_OK = 200
+HTTP_NOT_FOUND = 404
+MISSING_MESSAGE = b'does not exist'  # as in "Issue Does Not Exist" (not permissions, not outages)
+
+# The top level "id" and "key" members precede "fields" in issue documents.
+IDENTITY_PROBE_BYTES = 1024
+ISSUE_ID_PATTERN = re.compile(rb'"id"\s*:\s*"([^"]+)"')
+ISSUE_KEY_PATTERN = re.compile(rb'"key"\s*:\s*"([^"]+)"')
+
+RANGE_SEP = '..'  # as in PROJ-1..PROJ-80000 or PROJ-1..80000
+
+# Only fields.updated is the issue timestamp (comments, worklogs, and links carry their own "updated"),
+# so the members of the fields object are scanned (strings and brackets only) without parsing the document.
+FIELDS_PATTERN = re.compile(rb'"fields"\s*:\s*\{')
+JSON_TOKEN_PATTERN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]]')
+UPDATED_MEMBER = b'"updated"'
+MEMBER_VALUE_PATTERN = re.compile(rb'\s*:\s*"([^"]+)"')
 
 
 @no_type_check
@@ -34,13 +67,56 @@ def has_data(issue: dict[str, object]) -> bool:
     return issue and CHECK not in issue
 
 
+def declares_missing(status_code: int, payload: bytes) -> bool:
+    """Report if the response states that the issue does not exist (any other failure is transient)."""
+    if status_code == HTTP_NOT_FOUND:
+        return True
+    return CHECK_PROBE in payload[:PROBE_BYTES] and MISSING_MESSAGE in payload.lower()
+
+
+def payload_has_data(payload: bytes) -> bool:
+    """Cheap shape check of a serialized issue document (without parsing it)."""
+    head = payload[:PROBE_BYTES].lstrip()
+    return head.startswith(b'{') and CHECK_PROBE not in head
+
+
+def fields_updated(payload: bytes) -> Union[bytes, None]:
+    """The raw value of the updated member of the fields object in the serialized document (None if not found)."""
+    start = FIELDS_PATTERN.search(payload)
+    if start is None:
+        return None
+    depth = 1
+    for token in JSON_TOKEN_PATTERN.finditer(payload, start.end()):
+        text = token.group()
+        if text in (b'{', b'['):
+            depth += 1
+        elif text in (b'}', b']'):
+            depth -= 1
+            if not depth:
+                return None
+        elif depth == 1 and text == UPDATED_MEMBER:
+            value = MEMBER_VALUE_PATTERN.match(payload, token.end())
+            if value is not None:
+                return value.group(1)
+    return None
+
+
 @no_type_check
-def archive(data, file_path: pathlib.Path) -> None:
-    """Create .xz files for long term storage."""
-    if file_path.suffixes[-1] != XZ_EXT:
-        file_path = file_path.with_suffix(file_path.suffix + XZ_EXT)
-    with lzma.open(file_path, 'w', check=lzma.CHECK_SHA256, filters=XZ_FILTERS) as f:
-        f.write(json.dumps(data).encode(encoding=ENCODING, errors=ENCODING_ERRORS_POLICY))
+def payload_update_timestamp(payload: bytes) -> Union[dti.datetime, None]:
+    """Attempt safe extract and parse of updated issue timestamp from the serialized document.
+
+    Falls back to parsing the document if fields.updated cannot be found by the scan.
+    """
+    stamp = fields_updated(payload)
+    if stamp is not None:
+        try:
+            return parse_timestamp(stamp.decode(ENCODING))
+        except (AssertionError, ValueError):
+            pass
+    try:
+        return valid_update_timestamp(json.loads(payload))
+    except (AssertionError, AttributeError, ValueError):
+        return None
 
 
 def looks_like_issue_key(a_key: str) -> bool:
@@ -57,6 +133,74 @@ def looks_like_issue_key(a_key: str) -> bool:
     return True
 
 
+def expand_key_ranges(args: Iterable[str]) -> Iterator[str]:
+    """Yield the keys with ranges (PROJ-1..PROJ-80000 or PROJ-1..80000) expanded lazily."""
+    for arg in args:
+        if RANGE_SEP not in arg:
+            yield arg
+            continue
+        first, last = arg.split(RANGE_SEP, 1)
+        project, _, start = first.rpartition(DASH)
+        end = last.rpartition(DASH)[2]
+        if not project or not start.isdigit() or not end.isdigit() or last not in (end, f'{project}{DASH}{end}'):
+            log.debug(f'ignoring possibly invalid issue key range ({arg})')
+            continue
+        for serial in range(int(start), int(end) + 1):
+            yield f'{project}{DASH}{serial}'
+
+
+def valid_issue_keys(args: Iterable[str], skip_missing: bool = True) -> Iterator[str]:
+    """Yield the plausible issue keys (ranges expanded) and skip the rest and the keys known to be missing.
+
+    Keys of moved issues are replaced by their canonical key and every key is yielded once.
+    """
+    seen = set()
+    for a_key in expand_key_ranges(args):
+        if not looks_like_issue_key(a_key):
+            log.debug(f'ignoring possibly invalid issue key ({a_key})')
+            continue
+        if skip_missing and missing.missing_keys().is_known(a_key):
+            log.debug(f'skipping issue key known to be missing ({a_key})')
+            continue
+        canonical = aliases.aliases().canonical(a_key)
+        if canonical != a_key:
+            log.debug(f'requesting issue key ({a_key}) as ({canonical})')
+        if canonical not in seen:
+            seen.add(canonical)
+            yield canonical
+
+
+def payload_identity(payload: bytes) -> tuple[Union[str, None], Union[str, None]]:
+    """The key and id of the serialized issue document (None if not found)."""
+    head = payload[:IDENTITY_PROBE_BYTES]
+    key_match, id_match = ISSUE_KEY_PATTERN.search(head), ISSUE_ID_PATTERN.search(head)
+    issue_key = key_match.group(1).decode(ENCODING) if key_match else None
+    issue_id = id_match.group(1).decode(ENCODING) if id_match else None
+    return issue_key, issue_id
+
+
+def canonical_issue_key(issue_key: str, payload: bytes) -> str:
+    """The key the server delivered the issue under (recording the requested key as alias if it differs)."""
+    delivered, issue_id = payload_identity(payload)
+    if not delivered or delivered.upper() == issue_key.upper():
+        return issue_key
+    aliases.aliases().remember(issue_key, delivered, issue_id)
+    return delivered.upper()
+
+
+def discard_alias_archive(alias: str, canonical: str) -> None:
+    """Remove the archive file stored under the alias once the issue is stored under its canonical key.
+
+    Pack entries stay (segments are append only) - readers resolve the alias through the alias index.
+    """
+    if alias.upper() == canonical.upper():
+        return
+    store = storage.store_for(alias)
+    if isinstance(store, storage.FileStore) and (path := store.find(alias)) is not None:
+        path.unlink(missing_ok=True)
+        log.info(f'removed archive ({path}) of alias {alias} now stored as {canonical}')
+
+
 @no_type_check
 def valid_update_timestamp(data: dict[str, object]) -> Union[str, None]:
     """Attempt safe extract and parse of updated issue timestamp."""
@@ -69,49 +213,153 @@ def valid_update_timestamp(data: dict[str, object]) -> Union[str, None]:
 
 
 @no_type_check
-def fetch_issue(issue_key: str, auth_token: HTTPBasicAuth, wait_max_millis: float = WAIT_MAX_MILLIS) -> None:
-    """DRY."""
-    millis = random.uniform(0.0, wait_max_millis)
-    time.sleep(millis / 1e3)
-    log.debug(
-        f'  at({dti.datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")}), nice({millis / 1e3 :5.3f})secs, then({issue_key}) ...'
-    )
+def download_issue(
+    issue_key: str,
+    auth_token: HTTPBasicAuth,
+    wait_max_millis: float = WAIT_MAX_MILLIS,
+    passthrough: bool = PASSTHROUGH,
+    full_changelog: bool = changelog.FULL_CHANGELOG,
+) -> tuple[Union[bytes, None], Union[dti.datetime, None]]:
+    """Retrieve the serialized issue and its updated timestamp (None, None for non-existing issues).
+
+    Other failures (throttling, outages, authorization) raise a ValueError - the issue may well exist.
+    In passthrough mode the received bytes are kept as is instead of parsing and re-serializing them.
+    With full_changelog a truncated embedded changelog is completed from the changelog endpoint.
+    """
+    millis = random.uniform(0.0, wait_max_millis) if wait_max_millis > 0 else 0.0
+    if millis:
+        time.sleep(millis / 1e3)
+    stamp = dti.datetime.now().strftime('%Y-%m-%dT%H:%M:%S.%f')
+    log.debug(f'  at({stamp}), nice({millis / 1e3 :5.3f})secs, then({issue_key}) ...')
     headers = {'Content-Type': 'application/json'}
-    project = issue_key.split(DASH, 1)[0].lower()
-    project_path = pathlib.Path(ISSUE_STORAGE, project)
-    project_path.mkdir(parents=True, exist_ok=True)
-    r = requests.get(
+    r = rest.transport().request(
+        'GET',
         ISSUE_URL_TEMPLATE % (issue_key,),
         auth=auth_token,
         headers=headers,
     )
+    log.debug(f'{issue_key} <- ({r.status_code}, {r.encoding}, {len(r.content)} bytes)')
+    if r.status_code != HTTP_OK or not payload_has_data(r.content):
+        if declares_missing(r.status_code, r.content):
+            return None, None
+        raise ValueError(f'fetching ({issue_key}) failed with status ({r.status_code}): {r.content[:PROBE_BYTES]!r}')
+    if passthrough:
+        payload = r.content
+        if DEBUG:
+            with open(f'{issue_key.lower()}.json', 'wb') as dump:
+                dump.write(payload)
+        if full_changelog:
+            payload = changelog.complete_payload(issue_key, payload, auth_token)
+        return payload, payload_update_timestamp(payload)
+
     data = r.json()
     if DEBUG:
         with open(f'{issue_key.lower()}.json', 'w') as dump:
             json.dump(data, dump)
-    if has_data(data):
-        archive_file_path = project_path / f'{issue_key.lower()}.json{XZ_EXT}'
-        archive(data, archive_file_path)
-        archived_size = archive_file_path.stat().st_size
-        log.debug(f'{archived_size :10d} <- ({r.status_code}, {r.encoding}, {len(r.content)} bytes)')
-        updated = valid_update_timestamp(data)
-        if updated:
-            a_time = time.mktime(updated.timetuple())
-            m_time = a_time
-            os.utime(archive_file_path, (a_time, m_time))
-        else:
-            log.error(f'failed updated timestamp extraction for {issue_key}')
+    if not has_data(data):
+        raise ValueError(f'fetching ({issue_key}) delivered no issue data')
+    if full_changelog:
+        changelog.complete_issue(issue_key, data, auth_token)
+    payload = json.dumps(data).encode(encoding=ENCODING, errors=ENCODING_ERRORS_POLICY)
+    return payload, valid_update_timestamp(data)
+
+
+def store_issue(issue_key: str, blob: bytes, codec_spec: str, updated: Union[dti.datetime, None]) -> str:
+    """Hand the compressed issue to the storage backend of its project and return the location."""
+    if not updated:
+        log.error(f'failed updated timestamp extraction for {issue_key}')
+    location = storage.store_for(issue_key).put(
+        issue_key, blob, codec_spec, storage.epoch_of(updated) if updated else None
+    )
+    log.debug(f'{len(blob) :10d} -> {location}')
+    return location
 
 
 @no_type_check
-def fetch_issues(args: list[str], auth_token: HTTPBasicAuth, wait_max_millis: float = WAIT_MAX_MILLIS) -> None:
-    """Fetch and inspect."""
+def fetch_issue(
+    issue_key: str,
+    auth_token: HTTPBasicAuth,
+    wait_max_millis: float = WAIT_MAX_MILLIS,
+    passthrough: bool = PASSTHROUGH,
+    codec_spec: str = codec.CODEC_SPEC,
+    full_changelog: bool = changelog.FULL_CHANGELOG,
+) -> Union[str, None]:
+    """DRY (in passthrough mode the received bytes are archived without parsing and re-serializing).
+
+    Returns the storage location (None for non-existing issues - only those enter the negative cache).
+    """
+    payload, updated = download_issue(issue_key, auth_token, wait_max_millis, passthrough, full_changelog)
+    if payload is None:
+        missing.missing_keys().remember(issue_key)
+        return None
+    canonical = canonical_issue_key(issue_key, payload)
+    location = store_issue(canonical, codec.codec_from_spec(codec_spec).compress(payload), codec_spec, updated)
+    discard_alias_archive(issue_key, canonical)
+    return location
+
+
+@no_type_check
+def fetch_issues(
+    args: list[str],
+    auth_token: HTTPBasicAuth,
+    wait_max_millis: float = WAIT_MAX_MILLIS,
+    workers: int = FETCH_WORKERS,
+    passthrough: bool = PASSTHROUGH,
+    codec_spec: str = codec.CODEC_SPEC,
+    full_changelog: bool = changelog.FULL_CHANGELOG,
+) -> None:
+    """Fetch and inspect (with up to workers issues in flight)."""
     if not args:
         raise ValueError(f'nothing to pull in args ({args})?')
     random.seed(time.time_ns())
-    for a_key in args:
-        if looks_like_issue_key(a_key):
-            fetch_issue(a_key, auth_token=auth_token, wait_max_millis=wait_max_millis)
-        else:
-            log.debug(f'ignoring possibly invalid issue key ({a_key})')
+    keys = valid_issue_keys(args)
+    if workers <= 1:
+        failed = 0
+        for a_key in keys:
+            try:
+                fetch_issue(
+                    a_key,
+                    auth_token=auth_token,
+                    wait_max_millis=wait_max_millis,
+                    passthrough=passthrough,
+                    codec_spec=codec_spec,
+                    full_changelog=full_changelog,
+                )
+            except ValueError as err:
+                log.error(f'failed fetching {a_key}: {err}')
+                failed += 1
+        if failed:
+            log.error(f'failed to fetch {failed} issues')
+    else:
+        if rest.transport().pool_maxsize < workers:
+            rest.configure(pool_maxsize=workers)
+        failed = 0
+        with cf.ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = {}
+            for a_key in keys:
+                if len(in_flight) >= 2 * workers:
+                    failed += _harvest(in_flight, cf.FIRST_COMPLETED)
+                future = executor.submit(
+                    fetch_issue, a_key, auth_token, wait_max_millis, passthrough, codec_spec, full_changelog
+                )
+                in_flight[future] = a_key
+            failed += _harvest(in_flight, cf.ALL_COMPLETED)
+        if failed:
+            log.error(f'failed to fetch {failed} issues')
+    log.info(f'transport stats {rest.transport().stats()}')
+    log.info(f'missing keys {missing.missing_keys().stats()}')
+    log.info(f'aliases {aliases.aliases().stats()}')
     log.info(f'that is all for now and args ({args})')
+
+
+def _harvest(in_flight: dict[cf.Future, str], return_when: str) -> int:
+    """Collect finished fetches, log failures, and return the failure count."""
+    done, _ = cf.wait(in_flight, return_when=return_when)
+    failed = 0
+    for future in done:
+        a_key = in_flight.pop(future)
+        error = future.exception()
+        if error is not None:
+            log.error(f'failed fetching {a_key}: {error}')
+            failed += 1
+    return failed
@@ -0,0 +1,137 @@
+"""Cloud Walker (Norwegian: skyvandrer) - parallel archive fingerprinting for the inventory."""
+
+import concurrent.futures as cf
+import hashlib
+import json
+import lzma
+import mmap
+import os
+import pathlib
+import random
+import tempfile
+import time
+from typing import Union
+
+from skyvandrer import APP_ENV, ENCODING, log
+
+PathlikeType = Union[str, pathlib.Path]
+HashCacheType = dict[str, list[Union[int, str]]]
+
+CHUNK_SIZE = 1 << 20  # hashlib releases the GIL for updates of this size
+MMAP_MIN_BYTES = 4 << 20  # larger files are hashed through a memory map
+THREAD = 'thread'
+PROCESS = 'process'
+POOLS = (THREAD, PROCESS)
+INVENTORY_WORKERS = int(os.getenv(f'{APP_ENV}_INVENTORY_WORKERS', '0'))  # zero hashes serially
+INVENTORY_POOL = os.getenv(f'{APP_ENV}_INVENTORY_POOL', THREAD)
+
+HASHER = {
+    'sha512': hashlib.sha512,
+    'sha256': hashlib.sha256,
+}
+
+
+def hash_file(path: PathlikeType, algo: str = 'sha256') -> str:
+    """Return the hex digest of the data from file (large reads or a memory map for big files)."""
+    if algo not in HASHER:
+        raise KeyError(f'Unsupported hash algorithm requested - {algo} is not in {tuple(HASHER.keys())}')
+    hasher = HASHER[algo]()
+    with open(path, 'rb') as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size >= MMAP_MIN_BYTES:
+            with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                hasher.update(mapped)
+        else:
+            while chunk := handle.read(CHUNK_SIZE):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hash_files(paths: list[str], workers: int = INVENTORY_WORKERS, pool: str = INVENTORY_POOL) -> list[str]:
+    """Fingerprints of the files in the order of paths (hashed on a thread or process pool if workers > 1)."""
+    if workers <= 1 or len(paths) <= 1:
+        return [hash_file(path) for path in paths]
+    if pool not in POOLS:
+        raise KeyError(f'Unsupported pool requested - {pool} is not in {POOLS}')
+    if pool == PROCESS:
+        with cf.ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(hash_file, paths, chunksize=max(1, len(paths) // (4 * workers))))
+    with cf.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(hash_file, paths))
+
+
+def stat_files(paths: list[str], workers: int = INVENTORY_WORKERS) -> list[os.stat_result]:
+    """Stat results of the files in the order of paths (on a thread pool if workers > 1)."""
+    if workers <= 1 or len(paths) <= 1:
+        return [os.stat(path) for path in paths]
+    with cf.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(os.stat, paths))
+
+
+def fingerprint_files(
+    paths: list[str],
+    cache: HashCacheType,
+    counts: dict[str, int],
+    force: bool = False,
+    workers: int = INVENTORY_WORKERS,
+    pool: str = INVENTORY_POOL,
+) -> list[tuple[int, float, str]]:
+    """Size, mtime, and fingerprint per file in the order of paths (rehashing only changed files unless forced)."""
+    stats = stat_files(paths, workers)
+    cache_keys = [os.path.abspath(path) for path in paths]
+    signatures = [[stat.st_size, stat.st_mtime_ns, stat.st_ino] for stat in stats]
+    stale = [
+        slot
+        for slot, (cache_key, signature) in enumerate(zip(cache_keys, signatures))
+        if force or cache.get(cache_key, [])[:3] != signature
+    ]
+    counts['hits'] += len(paths) - len(stale)
+    counts['misses'] += len(stale)
+    for slot, fingerprint in zip(stale, hash_files([paths[slot] for slot in stale], workers, pool)):
+        cache[cache_keys[slot]] = [*signatures[slot], fingerprint]
+    return [(stat.st_size, stat.st_mtime, str(cache[key][3])) for stat, key in zip(stats, cache_keys)]
+
+
+def synthetic_tree(root: PathlikeType, file_count: int = 3000, seed: int = 42) -> list[str]:
+    """Write file_count small .json.xz issue archives of a synthetic project below root and return the paths."""
+    folder = pathlib.Path(root, 'syn')
+    folder.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for serial in range(1, file_count + 1):
+        document = {'key': f'SYN-{serial}', 'fields': {'summary': ' '.join(str(rng.random()) for _ in range(64))}}
+        path = folder / f'syn-{serial}.json.xz'
+        with open(path, 'wb') as handle:
+            handle.write(lzma.compress(json.dumps(document).encode(ENCODING), preset=1))
+        paths.append(str(path))
+    return paths
+
+
+def benchmark(
+    file_count: int = 3000, workers: int = os.cpu_count() or 4, root: Union[PathlikeType, None] = None
+) -> dict[str, dict[str, float]]:
+    """Compare serial and parallel (thread and process pool) fingerprinting on a synthetic tree.
+
+    Every mode hashes all files (no cache) and must produce the same fingerprints in the same order.
+    """
+    with tempfile.TemporaryDirectory(dir=root) as folder:
+        paths = synthetic_tree(folder, file_count)
+        megabytes = sum(os.stat(path).st_size for path in paths) / 1e6
+        log.info(f'benchmarking inventory fingerprints on {file_count} files ({megabytes :.3f} MB)')
+        results, reference = {}, None
+        for mode, mode_workers, pool in (('serial', 1, THREAD), (THREAD, workers, THREAD), (PROCESS, workers, PROCESS)):
+            counts = {'hits': 0, 'misses': 0}
+            start = time.perf_counter()
+            fingerprints = fingerprint_files(paths, {}, counts, workers=mode_workers, pool=pool)
+            seconds = time.perf_counter() - start
+            if reference is None:
+                reference = fingerprints
+            elif fingerprints != reference:
+                raise RuntimeError(f'{mode} fingerprints differ from the serial ones')
+            results[mode] = {
+                'workers': mode_workers,
+                'seconds': seconds,
+                'files_per_second': file_count / seconds if seconds else 0.0,
+                'megabytes_per_second': megabytes / seconds if seconds else 0.0,
+            }
+    return results
@@ -1,105 +1,84 @@
-#! /usr/bin/env python
-"""Get users from group (of ticket management system).
+"""Get users from group (of ticket management system)."""
 
-Returns a paginated list of all users in a group.
-Note that users are ordered by username, however the username is not returned in the results due to privacy reasons.
-
-Source:
-
-<https://developer.atlassian.com/cloud/jira/platform/rest/v3/api-group-groups/#api-rest-api-3-group-member-get>
-
-"""
-import json
-import os
 import re
-import sys
-from typing import Union
+from typing import Iterator, Union
 
-import requests
-from requests.auth import HTTPBasicAuth
-
-CollectorType = dict[str, Union[bool, int, str, None, dict[str, str], list[object]]]
-QueryType = dict[str, Union[bool, int, str, list[str]]]
+import skyvandrer.paginate as paginate
+import skyvandrer.rest as rest
+from skyvandrer import API_BASE_URL, API_TOKEN, API_USER, CollectorType, QueryType, credentials_or_die
 
 UUID_PATTERN = re.compile(r'^[\da-f]{8}-([\da-f]{4}-){3}[\da-f]{12}$')
 
-API_BASE_URL = os.getenv('SUHTEITA_BASE_URL', '')
-API_USER = os.getenv('SUHTEITA_USER', '')
-API_TOKEN = os.getenv('SUHTEITA_TOKEN', '')
-
-if not all(value for value in (API_BASE_URL, API_USER, API_TOKEN)):
-    raise KeyError('missing at least one value for API_BASE_URL, API_USER, and API_TOKEN')
-
-url = f'{API_BASE_URL}/rest/api/3/group/member'
-
-auth = HTTPBasicAuth(API_USER, API_TOKEN)
-
-headers = {'Accept': 'application/json'}
-
-try:
-    group_id_or_name = sys.argv[1]
-except IndexError as err:
-    raise Exception('missing group id or name') from err
-
-# experimental matcher for id shape as 5e1c5ec7-a634-4cd9-887a-618166d49a25
-#                                      012345678
-is_group_id = bool(UUID_PATTERN.match(group_id_or_name.lower()))
-payload_key = 'groupId' if is_group_id else 'groupname'
-
-query: QueryType = {
-    'startAt': 0,
-    payload_key: group_id_or_name,
-    'includeInactiveUsers': True,
-}
-
-collector: CollectorType = {
-    'endpoint': url,
-    'query': {k: v for k, v in query.items() if k != 'startAt'},  # type: ignore
-    'is_complete': False,
-    'page_capacity': 0,
-    'roundtrip_count': 0,
-    'start_index': 0,
-    'total_count': 0,
-    'errors': [],
-    'error_messages': [],
-    'items': [],
-}
-my_start = 0
-incomplete = True
-
-while incomplete:
-    query['startAt'] = my_start
-    response = requests.request('GET', url, headers=headers, params=query, auth=auth)  # type: ignore
-    data = json.loads(response.text)
-    error_messages = data.get('errorMessages', [])
-    if error_messages:
-        for entry in error_messages:
-            collector['error_messages'].append(entry)  # type: ignore
-        errors = data.get('errors', [])
-        for entry in errors:
-            collector['errors'].append(entry)  # type: ignore
-        break
-
-    total = data['total']
-    if not collector['total_count']:
-        collector['total_count'] = total
-    elif collector['total_count'] != total:
-        raise IndexError(f'initial total_count({collector["total_count"]}) != ({total})')
-
-    max_results = data['maxResults']
-    if not collector['page_capacity']:
-        collector['page_capacity'] = max_results
-    elif collector['page_capacity'] != max_results:
-        raise IndexError(f'initial page_capacity({collector["page_capacity"]}) != ({max_results})')
-
-    for entry in data['values']:
-        collector['items'].append(entry)  # type: ignore
-
-    collector['is_complete'] = data['isLast']
-    incomplete = not collector['is_complete']
-
-    my_start += max_results
-    collector['roundtrip_count'] += 1  # type: ignore
-
-
-print(json.dumps(collector, sort_keys=False, indent=4, separators=(',', ': ')))
+
+def iter_users_from_group(
+    group_id_or_name: str,
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = paginate.PAGE_CONCURRENCY,
+    collector: Union[CollectorType, None] = None,
+) -> Iterator[object]:
+    """Yield the users in the group (of ticket management system) as each page arrives.
+
+    The pagination metadata (roundtrip_count, total_count, is_complete, ...) is kept current in the collector.
+    """
+    credentials_or_die(api_base_url=api_base_url, api_user=api_user, api_token=api_token)
+
+    url = f'{API_BASE_URL}/rest/api/3/group/member'
+
+    auth = rest.auth(api_user=api_user, api_token=api_token)
+
+    headers = {'Accept': 'application/json'}
+
+    # experimental matcher for id shape as 5e1c5ec7-a634-4cd9-887a-618166d49a25
+    #                                      012345678
+    is_group_id = bool(UUID_PATTERN.match(group_id_or_name.lower()))
+    payload_key = 'groupId' if is_group_id else 'groupname'
+
+    query: QueryType = {
+        'startAt': 0,
+        payload_key: group_id_or_name,
+        'includeInactiveUsers': True,
+    }
+
+    if collector is None:
+        collector = {}
+    collector.update(
+        {
+            'endpoint': url,
+            'query': {k: v for k, v in query.items() if k != 'startAt'},  # type: ignore
+            'is_complete': False,
+            'page_capacity': 0,
+            'roundtrip_count': 0,
+            'start_index': 0,
+            'total_count': 0,
+            'errors': [],
+            'error_messages': [],
+        }
+    )
+    yield from paginate.iter_pages(url, headers, query, auth, collector, concurrency=concurrency)  # type: ignore
+
+
+def get_users_from_group(
+    group_id_or_name: str,
+    api_base_url: str = API_BASE_URL,
+    api_user: str = API_USER,
+    api_token: str = API_TOKEN,
+    concurrency: int = paginate.PAGE_CONCURRENCY,
+) -> CollectorType:
+    """Get users from group (of ticket management system).
+
+    Returns a paginated list of all users in a group.
+    Note that users are ordered by username, however the username is not returned in the results due to privacy reasons.
+
+    Source:
+
+    <https://developer.atlassian.com/cloud/jira/platform/rest/v3/api-group-groups/#api-rest-api-3-group-member-get>
+
+    """
+    collector: CollectorType = {}
+    items = list(
+        iter_users_from_group(group_id_or_name, api_base_url, api_user, api_token, concurrency, collector=collector)
+    )
+    collector['items'] = items
+    return collector
@@ -1,45 +1,64 @@
 """Inventory of proxy."""
+import bisect
+import concurrent.futures as cf
 import datetime as dti
-import hashlib
 import json
-import lzma
+import math
+import os
 import pathlib
 import sys
-from typing import Union, no_type_check
+from typing import Iterable, Iterator, Union, no_type_check
+
+from skyvandrer import APP_ENV, ISSUE_STORAGE, env_flag, log
+from skyvandrer.codec import is_archive
+import skyvandrer.inventory_stats as inventory_stats
+from skyvandrer.fingerprint import INVENTORY_POOL, INVENTORY_WORKERS, fingerprint_files, hash_file  # noqa
+from skyvandrer.inventory_db import INVENTORY_DB_NAME, InventoryDB
+from skyvandrer.storage import is_pack_folder, open_store
 
 PathlikeType = Union[str, pathlib.Path]
 
-CHUNK_SIZE = 2 << 15
 DASH = '-'
 ENCODING = 'utf-8'
 ENCODING_ERRORS_POLICY = 'ignore'
 ISO_FMT = '%Y-%m-%dT%H:%M:%S+00:00'
-XZ_EXT = '.xz'
-XZ_FILTERS = [{'id': lzma.FILTER_LZMA2, 'preset': 7 | lzma.PRESET_EXTREME}]
-LZMA_KWARGS = {'check': lzma.CHECK_SHA256, 'filters': XZ_FILTERS}
 SECONDS_PER_DAY = 86_400
-
-HASHER = {
-    'sha512': hashlib.sha512,
-    'sha256': hashlib.sha256,
-}
+INVENTORY_FOLDER = pathlib.Path('inventory')
+INDEX_NAME = 'index.json'
+HASH_CACHE_NAME = 'hash-cache.json'
+HASH_CACHE_PATH = INVENTORY_FOLDER / HASH_CACHE_NAME
+DISTRIBUTIONS = env_flag(f'{APP_ENV}_INVENTORY_DISTRIBUTIONS', True)
+LEGACY_SUFFIX = '.per-key.json'  # compatibility export in the historic per serial format
+LEGACY_EXPORT = env_flag(f'{APP_ENV}_INVENTORY_LEGACY')
+INVENTORY_PROJECT_WORKERS = int(os.getenv(f'{APP_ENV}_INVENTORY_PROJECT_WORKERS', '4'))
+FORCE_REHASH = '--rehash'
+WORKERS_OPTION = '--workers'
+POOL_OPTION = '--pool'
 
 
-def file_stats(path: PathlikeType) -> tuple[int, dti.datetime, dti.datetime]:
-    """File system stats of file."""
+def file_stats(path: PathlikeType) -> tuple[int, float, float]:
+    """File system stats of file (size, mtime, and atime epoch seconds)."""
     stats = pathlib.Path(path).stat()
     return stats.st_size, stats.st_mtime, stats.st_atime
 
 
-def hash_file(path: PathlikeType, algo: str = 'sha256') -> str:
-    """Return the SHA256 hex digest of the data from file."""
-    if algo not in HASHER:
-        raise KeyError(f'Unsupported hash algorithm requested - {algo} is not in {tuple(HASHER.keys())}')
-    hash = HASHER[algo]()
-    with open(path, 'rb') as handle:
-        while chunk := handle.read(CHUNK_SIZE):
-            hash.update(chunk)
-    return hash.hexdigest()
+def load_hash_cache(path: PathlikeType = HASH_CACHE_PATH) -> dict[str, list[Union[int, str]]]:
+    """Load the (size, mtime_ns, inode, fingerprint) per absolute path cache (empty if not present)."""
+    try:
+        with open(path, 'rt', encoding=ENCODING) as handle:
+            return json.load(handle)  # type: ignore
+    except FileNotFoundError:
+        return {}
+
+
+def save_hash_cache(cache: dict[str, list[Union[int, str]]], path: PathlikeType = HASH_CACHE_PATH) -> None:
+    """Replace the hash cache atomically."""
+    a_path = pathlib.Path(path)
+    a_path.parent.mkdir(parents=True, exist_ok=True)
+    partial = a_path.with_name(f'{a_path.name}.partial')
+    with open(partial, 'wt', encoding=ENCODING) as handle:
+        json.dump(cache, handle)
+    os.replace(partial, a_path)
 
 
 def key_id_from_path(path: PathlikeType) -> tuple[str, int]:
@@ -53,100 +72,338 @@ def key_id_from_path(path: PathlikeType) -> tuple[str, int]:
     return code, int(serial)
 
 
-collector = {}
-max_serial = 0
-the_code = None
-the_container_path = None
-for path in sys.argv[1:]:
-    fingerprint = hash_file(path)
-    size_bytes, m_time, a_time = file_stats(path)
-    m_ts_disp = dti.datetime.utcfromtimestamp(m_time).strftime(ISO_FMT)
-    code, serial = key_id_from_path(path)
+def stored_archives(
+    paths: list[str],
+    cache: Union[dict[str, list[Union[int, str]]], None] = None,
+    counts: Union[dict[str, int], None] = None,
+    force: bool = False,
+    workers: int = INVENTORY_WORKERS,
+    pool: str = INVENTORY_POOL,
+) -> Iterator[tuple[str, str, str, int, float, str]]:
+    """Yield (key, path, container, size, mtime, fingerprint) for archive files and all entries of pack folders.
 
-    if the_code is None:
-        the_code = code
-    elif the_code != code:
-        raise ValueError('do not mix dfferent projects to inventize')
-
-    if the_container_path is None:
-        the_container_path = str(pathlib.Path(path).parent)
-    elif the_container_path != str(pathlib.Path(path).parent):
-        raise ValueError('do not mix projects from different containers')
-
-    max_serial = max(serial, max_serial)
-    key = f'{code}-{serial}'
-    collector[key] = {
-        'path': str(path),
-        'code': code,
-        'serial': serial,
-        'size_bytes_compresed': size_bytes,
-        'modified': m_ts_disp,
-        'fingerprint': f'sha256:{fingerprint}'
+    Archive files are only hashed if their stat signature is not in the cache (or force is set) - with workers
+    above one on a thread or process pool. The order of paths is kept.
+    """
+    if cache is None:
+        cache = {}
+    if counts is None:
+        counts = {'hits': 0, 'misses': 0}
+    files = [path for path in paths if not (pathlib.Path(path).is_dir() and is_pack_folder(path))]
+    fingerprinted = dict(zip(files, fingerprint_files(files, cache, counts, force, workers, pool)))
+    for path in paths:
+        folder = pathlib.Path(path)
+        if folder.is_dir() and is_pack_folder(folder):
+            for entry in open_store(folder.name, root=folder.parent).entries():
+                yield (
+                    entry.key,
+                    entry.location,
+                    str(folder),
+                    entry.size_bytes,
+                    entry.updated,
+                    entry.sha256,
+                )  # type: ignore
+        else:
+            size_bytes, m_time, fingerprint = fingerprinted[path]
+            yield path, path, str(folder.parent), size_bytes, m_time, fingerprint  # type: ignore
+
+
+def collect_project(
+    paths: list[str],
+    cache: Union[dict[str, list[Union[int, str]]], None] = None,
+    counts: Union[dict[str, int], None] = None,
+    force: bool = False,
+    workers: int = INVENTORY_WORKERS,
+    pool: str = INVENTORY_POOL,
+    echo: bool = False,
+) -> tuple[Union[str, None], Union[str, None], dict[str, dict[str, object]], int]:
+    """Collect the archives of one project and return (code, container path, collector, max serial)."""
+    collector = {}
+    max_serial = 0
+    the_code = None
+    the_container_path = None
+    for key_source, path, container_path, size_bytes, m_time, fingerprint in stored_archives(
+        paths, cache, counts, force, workers, pool
+    ):
+        m_ts_disp = dti.datetime.utcfromtimestamp(m_time).strftime(ISO_FMT)
+        code, serial = key_id_from_path(key_source)
+
+        if the_code is None:
+            the_code = code
+        elif the_code != code:
+            raise ValueError('do not mix dfferent projects to inventize')
+
+        if the_container_path is None:
+            the_container_path = container_path
+        elif the_container_path != container_path:
+            raise ValueError('do not mix projects from different containers')
+
+        max_serial = max(serial, max_serial)
+        key = f'{code}-{serial}'
+        collector[key] = {
+            'path': str(path),
+            'code': code,
+            'serial': serial,
+            'size_bytes_compresed': size_bytes,
+            'modified': m_ts_disp,
+            'fingerprint': f'sha256:{fingerprint}'
+        }
+        if echo:
+            print(f'{code}-{serial} <- ({size_bytes} bytes, modified:{m_ts_disp}, sha256:{fingerprint})')
+    return the_code, the_container_path, collector, max_serial
+
+
+def presence_ranges(serials: Iterable[int]) -> list[list[int]]:
+    """Sorted inclusive [first, last] runs of the serials."""
+    ranges: list[list[int]] = []
+    for serial in sorted(set(serials)):
+        if ranges and ranges[-1][1] + 1 == serial:
+            ranges[-1][1] = serial
+        else:
+            ranges.append([serial, serial])
+    return ranges
+
+
+def found_count(ranges: list[list[int]]) -> int:
+    """Number of serials in the runs."""
+    return sum(last - first + 1 for first, last in ranges)
+
+
+def is_present(ranges: list[list[int]], serial: int) -> bool:
+    """Report if the serial is in one of the runs (bisection)."""
+    slot = bisect.bisect_right(ranges, [serial, math.inf]) - 1
+    return slot >= 0 and ranges[slot][0] <= serial <= ranges[slot][1]
+
+
+def missing_ranges(ranges: list[list[int]], max_serial: int) -> list[list[int]]:
+    """Sorted inclusive [first, last] runs of the serials from 1 to max_serial not in the runs."""
+    gaps, expected = [], 1
+    for first, last in ranges:
+        if first > expected:
+            gaps.append([expected, first - 1])
+        expected = max(expected, last + 1)
+    if expected <= max_serial:
+        gaps.append([expected, max_serial])
+    return gaps
+
+
+@no_type_check
+def project_inventory(
+    the_code: str, the_container_path: str, collector: dict[str, dict[str, object]], max_serial: int
+) -> tuple[dict[str, object], dict[str, dict[str, object]]]:
+    """Derive the compact inventory (presence runs plus found issues) and the project stats from the archives.
+
+    The stats are computed from the presence runs and the found issues only (no pass over all serials).
+    With numpy available the sizes, stamps, and serials are reduced as arrays, and size and age distributions
+    and the serial density are added.
+    """
+    found_entries = sorted(
+        (entry for entry in collector.values() if 1 <= entry['serial'] <= max_serial), key=lambda e: e['serial']
+    )
+    present = presence_ranges(entry['serial'] for entry in found_entries)
+    issues = {f'{the_code}-{entry["serial"]}': entry for entry in found_entries}
+    found = found_count(present)
+    arrays = inventory_stats.arrays_from(issues) if found and inventory_stats.is_available() else None
+    if arrays is not None:
+        scalars = inventory_stats.scalar_stats(*arrays)
+        sum_size, min_size, max_size = scalars['sum_size'], scalars['min_size'], scalars['max_size']
+        min_modified = dti.datetime.utcfromtimestamp(scalars['min_mtime']).strftime(ISO_FMT)
+        max_modified = dti.datetime.utcfromtimestamp(scalars['max_mtime']).strftime(ISO_FMT)
+        timespan_seconds = scalars['max_mtime'] - scalars['min_mtime']
+    else:
+        sizes = [entry['size_bytes_compresed'] for entry in issues.values()]
+        modifieds = [entry['modified'] for entry in issues.values()]
+        sum_size = sum(sizes)
+        min_size, max_size = min(sizes, default=999_999_999_999), max(sizes, default=0)
+        min_modified = min(modifieds, default='9999-12-31T23:59:59+00:00')
+        max_modified = max(modifieds, default='1111-01-01T00:00:00+00:00')
+        timespan_seconds = (
+            dti.datetime.strptime(max_modified, ISO_FMT) - dti.datetime.strptime(min_modified, ISO_FMT)
+        ).total_seconds()
+    project_stats = {
+        the_code: {
+            'container_path': the_container_path,
+            'sum_size_bytes_compressed': sum_size,
+            'min_size_bytes_compressed': min_size,
+            'max_size_bytes_compressed': max_size,
+            'min_modified': min_modified,
+            'max_modified': max_modified,
+            'timespan_modified_seconds': timespan_seconds,
+            'timespan_modified_days': timespan_seconds / SECONDS_PER_DAY,
+            'min_serial': present[0][0] if present else 999_999,
+            'max_serial': max_serial,
+            'nominal_issue_count': max_serial,
+            'found_issue_count': found,
+            'missing_issue_count': max_serial - found,
+            'issue_defect_rate': (max_serial - found) / max_serial,
+        }
     }
-    print(f'{code}-{serial} <- ({size_bytes} bytes, modified:{m_ts_disp}, sha256:{fingerprint})')
-
-inventory = {}
-project_stats = {
-    the_code: {
-        'container_path': the_container_path,
-        'sum_size_bytes_compressed': 0,
-        'min_size_bytes_compressed': 999_999_999_999,
-        'max_size_bytes_compressed': 0,
-        'min_modified': '9999-12-31T23:59:59+00:00',
-        'max_modified': '1111-01-01T00:00:00+00:00',
-        'timespan_modified_seconds': 0,
-        'timespan_modified_days': 0,
-        'min_serial': 999_999,
-        'max_serial': 0,
-        'nominal_issue_count': 0,
-        'found_issue_count': 0,
-        'missing_issue_count': 0,
-        'issue_defect_rate': 0,
+    if DISTRIBUTIONS and arrays is not None:
+        project_stats[the_code]['distributions'] = inventory_stats.distribution_stats(*arrays, max_serial)
+    inventory = {
+        'code': the_code,
+        'max_serial': max_serial,
+        'present': present,
+        'issues': issues,
     }
-}
-min_size = project_stats[the_code]['min_size_bytes_compressed']
-max_size = project_stats[the_code]['max_size_bytes_compressed']
-min_modified = project_stats[the_code]['min_modified']
-max_modified = project_stats[the_code]['max_modified']
-min_serial = project_stats[the_code]['min_serial']
-for serial in range(1, max_serial + 1):
-    project_stats[the_code]['nominal_issue_count'] += 1
-    key = f'{the_code}-{serial}'
-    if key in collector:
-        project_stats[the_code]['found_issue_count'] += 1
-        project_stats[the_code]['sum_size_bytes_compressed'] += collector[key]['size_bytes_compresed']
-        min_size = min(min_size, collector[key]['size_bytes_compresed'])
-        max_size = max(max_size, collector[key]['size_bytes_compresed'])
-        min_modified = min(min_modified, collector[key]['modified'])
-        max_modified = max(max_modified, collector[key]['modified'])
-        min_serial = min(min_serial, serial)
-        inventory[key] = collector[key]
-    else:
-        inventory[key] = {}
+    return inventory, project_stats
+
+
+def legacy_inventory(inventory: dict[str, object]) -> dict[str, dict[str, object]]:
+    """The historic per serial format (with empty entries for the missing serials) of a compact inventory."""
+    the_code, issues = inventory['code'], inventory['issues']
+    return {
+        f'{the_code}-{serial}': issues.get(f'{the_code}-{serial}', {})  # type: ignore
+        for serial in range(1, inventory['max_serial'] + 1)  # type: ignore
+    }
+
+
+def load_inventory(path: PathlikeType) -> dict[str, object]:
+    """Read an inventory file of either format as compact inventory."""
+    with open(path, 'rt', encoding=ENCODING) as handle:
+        data = json.load(handle)
+    if 'present' in data and 'issues' in data:
+        return data  # type: ignore
+    issues = {key: entry for key, entry in data.items() if entry}
+    serials = [int(key.rsplit(DASH, 1)[1]) for key in data]
+    the_code = next(iter(data)).rsplit(DASH, 1)[0] if data else ''
+    return {
+        'code': the_code,
+        'max_serial': max(serials, default=0),
+        'present': presence_ranges(entry['serial'] for entry in issues.values()),
+        'issues': issues,
+    }
+
+
+def write_inventory(
+    the_code: str, inventory: dict[str, object], folder: PathlikeType = INVENTORY_FOLDER, legacy: bool = LEGACY_EXPORT
+) -> None:
+    """Write the compact inventory of the project to <folder>/<code>.json (and the per serial one if legacy)."""
+    with open(pathlib.Path(folder, f'{the_code.lower()}.json'), 'wt', encoding=ENCODING) as handle:
+        json.dump(inventory, handle, indent=2)
+    if legacy:
+        with open(pathlib.Path(folder, f'{the_code.lower()}{LEGACY_SUFFIX}'), 'wt', encoding=ENCODING) as handle:
+            json.dump(legacy_inventory(inventory), handle, indent=2)
+
 
-project_stats[the_code]['min_size_bytes_compressed'] = min_size
-project_stats[the_code]['max_size_bytes_compressed'] = max_size
+def open_inventory_db(folder: PathlikeType = INVENTORY_FOLDER) -> InventoryDB:
+    """The SQLite inventory of the folder (adopting the rollups of an existing index.json on first use)."""
+    db = InventoryDB(pathlib.Path(folder, INVENTORY_DB_NAME))
+    if not db.project_count():
+        db.import_index(pathlib.Path(folder, INDEX_NAME))
+    return db
 
-project_stats[the_code]['min_modified'] = min_modified
-project_stats[the_code]['max_modified'] = max_modified
-timespan_seconds = (dti.datetime.strptime(max_modified, ISO_FMT) - dti.datetime.strptime(min_modified, ISO_FMT)).total_seconds()
-project_stats[the_code]['timespan_modified_seconds'] = timespan_seconds
-project_stats[the_code]['timespan_modified_days'] = timespan_seconds / SECONDS_PER_DAY
 
-project_stats[the_code]['min_serial'] = min_serial
-project_stats[the_code]['max_serial'] = max_serial
+def update_index(
+    project_stats: dict[str, dict[str, object]], db: InventoryDB, folder: PathlikeType = INVENTORY_FOLDER
+) -> None:
+    """Upsert the project stats into the inventory database and export <folder>/index.json atomically from it."""
+    db.upsert_projects(project_stats)
+    db.write_index(pathlib.Path(folder, INDEX_NAME))
 
-project_stats[the_code]['missing_issue_count'] = project_stats[the_code]['nominal_issue_count'] - project_stats[the_code]['found_issue_count']
-project_stats[the_code]['issue_defect_rate'] = project_stats[the_code]['missing_issue_count'] / project_stats[the_code]['nominal_issue_count']
 
-print(json.dumps(project_stats, indent=2))
-with open(f'inventory/{the_code.lower()}.json', 'wt', encoding=ENCODING) as handle:
-    json.dump(inventory, handle, indent=2)
+def project_archives(folder: PathlikeType) -> list[str]:
+    """The inventory arguments for the project folder (the folder if packed, else its archive files)."""
+    if is_pack_folder(folder):
+        return [str(folder)]
+    with os.scandir(folder) as scanner:
+        return sorted(item.path for item in scanner if item.is_file() and is_archive(item.name))
+
+
+def inventize_storage(
+    root: PathlikeType = ISSUE_STORAGE,
+    folder: PathlikeType = INVENTORY_FOLDER,
+    projects: Union[list[str], None] = None,
+    workers: int = INVENTORY_PROJECT_WORKERS,
+    hash_workers: int = INVENTORY_WORKERS,
+    force: bool = False,
+) -> dict[str, dict[str, object]]:
+    """Inventory all (or the given) project folders below root in one pass and return the project stats.
+
+    Projects are processed on up to workers threads, each writes its <folder>/<code>.json and file rows into the
+    inventory database, and index.json is exported once (atomically) at the end. The hash cache is shared and saved
+    once.
+    """
+    if not projects:
+        with os.scandir(root) as scanner:
+            projects = sorted(item.name for item in scanner if item.is_dir())
+    pathlib.Path(folder).mkdir(parents=True, exist_ok=True)
+    cache = load_hash_cache(pathlib.Path(folder, HASH_CACHE_NAME))
+    db = open_inventory_db(folder)
+
+    def inventize_project(project: str) -> tuple[dict[str, dict[str, object]], dict[str, int]]:
+        counts = {'hits': 0, 'misses': 0}
+        paths = project_archives(pathlib.Path(root, project))
+        the_code, the_container_path, collector, max_serial = collect_project(
+            paths, cache, counts, force, hash_workers
+        )
+        if the_code is None:
+            return {}, counts
+        inventory, project_stats = project_inventory(the_code, the_container_path, collector, max_serial)
+        write_inventory(the_code, inventory, folder)
+        db.upsert_files(the_code, inventory['issues'])  # type: ignore
+        return project_stats, counts
+
+    all_stats: dict[str, dict[str, object]] = {}
+    hash_cache_counts = {'hits': 0, 'misses': 0}
+    failed = 0
+    with cf.ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(inventize_project, project): project for project in projects}
+        for future in cf.as_completed(futures):
+            try:
+                project_stats, counts = future.result()
+            except Exception as err:  # noqa - one unreadable project must not abort the others
+                log.error(f'failed to inventize project ({futures[future]}) below ({root}): {err}')
+                failed += 1
+                continue
+            all_stats.update(project_stats)
+            for name, count in counts.items():
+                hash_cache_counts[name] += count
+
+    save_hash_cache(cache, pathlib.Path(folder, HASH_CACHE_NAME))
+    update_index(dict(sorted(all_stats.items())), db, folder)
+    db.close()
+    log.info(f'inventized {len(all_stats)} projects below ({root}) with hash cache {hash_cache_counts}')
+    if failed:
+        log.error(f'failed to inventize {failed} projects below ({root})')
+    return all_stats
+
+
+def main(argv: list[str]) -> int:
+    """Inventory the archives (or pack folders) of one project given as paths (the historic interface)."""
+    force_rehash = FORCE_REHASH in argv
+    archive_paths = [arg for arg in argv if arg != FORCE_REHASH]
+    hash_workers, hash_pool = INVENTORY_WORKERS, INVENTORY_POOL
+    for option in (WORKERS_OPTION, POOL_OPTION):
+        if option in archive_paths:
+            slot = archive_paths.index(option)
+            value = archive_paths[slot + 1]
+            del archive_paths[slot : slot + 2]
+            if option == WORKERS_OPTION:
+                hash_workers = int(value)
+            else:
+                hash_pool = value
+    hash_cache = load_hash_cache()
+    hash_cache_counts = {'hits': 0, 'misses': 0}
+
+    the_code, the_container_path, collector, max_serial = collect_project(
+        archive_paths, hash_cache, hash_cache_counts, force_rehash, hash_workers, hash_pool, echo=True
+    )
+    if the_code is None:
+        log.error(f'no archives to inventize in ({archive_paths})')
+        return 1
+    inventory, project_stats = project_inventory(the_code, the_container_path, collector, max_serial)
+
+    save_hash_cache(hash_cache)
 
-with open(f'inventory/index.json', 'rt', encoding=ENCODING) as handle:
-    index = json.load(handle)
+    print(json.dumps({**project_stats, 'hash_cache': hash_cache_counts}, indent=2))
+    write_inventory(the_code, inventory)
+    db = open_inventory_db()
+    db.upsert_files(the_code, inventory['issues'])  # type: ignore
+    update_index(project_stats, db)
+    db.close()
+    return 0
 
-index[the_code] = project_stats[the_code]
 
-with open(f'inventory/index.json', 'wt', encoding=ENCODING) as handle:
-    json.dump(index, handle, indent=2)
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
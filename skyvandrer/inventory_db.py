@@ -0,0 +1,149 @@
+"""Cloud Walker (Norwegian: skyvandrer) - SQLite backed inventory index with per file rows and project rollups."""
+
+import datetime as dti
+import json
+import os
+import pathlib
+import time
+from typing import Union
+
+from skyvandrer import ENCODING
+from skyvandrer.sqlite_store import SQLiteStore
+
+PathlikeType = Union[str, pathlib.Path]
+
+INVENTORY_DB_NAME = 'inventory.sqlite'
+ISO_FMT = '%Y-%m-%dT%H:%M:%S+00:00'  # as in the inventory - sorts lexicographically in time order
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    key TEXT PRIMARY KEY,
+    project TEXT NOT NULL,
+    serial INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    modified TEXT NOT NULL,
+    fingerprint TEXT,
+    run REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS files_project_serial ON files (project, serial);
+CREATE INDEX IF NOT EXISTS files_modified ON files (modified);
+CREATE INDEX IF NOT EXISTS files_size ON files (size_bytes);
+CREATE TABLE IF NOT EXISTS projects (
+    code TEXT PRIMARY KEY,
+    stats TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+FILE_COLUMNS = ('key', 'project', 'serial', 'path', 'size_bytes', 'modified', 'fingerprint')
+
+
+class InventoryDB(SQLiteStore):
+    """Inventory rows per archive and stats rollups per project (WAL mode, safe for concurrent writers)."""
+
+    def __init__(self, path: PathlikeType) -> None:
+        super().__init__(path, SCHEMA)
+
+    def _transaction(self, statements: list[tuple[str, object]]) -> None:
+        """Run the (sql, parameters) statements in one immediate transaction (parameter lists run as many)."""
+        with self._immediate() as db:
+            for sql, parameters in statements:
+                if isinstance(parameters, list):
+                    db.executemany(sql, parameters)
+                else:
+                    db.execute(sql, parameters)  # type: ignore
+
+    def upsert_files(self, code: str, issues: dict[str, dict[str, object]]) -> None:
+        """Replace the file rows of the project by the found issues (bulk upsert, stale rows removed)."""
+        run = time.time()
+        rows = [
+            (
+                key,
+                code,
+                entry['serial'],
+                entry['path'],
+                entry['size_bytes_compresed'],
+                entry['modified'],
+                entry['fingerprint'],
+                run,
+            )
+            for key, entry in issues.items()
+        ]
+        self._transaction(
+            [
+                (
+                    'INSERT INTO files (key, project, serial, path, size_bytes, modified, fingerprint, run)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET'
+                    ' path = excluded.path, size_bytes = excluded.size_bytes, modified = excluded.modified,'
+                    ' fingerprint = excluded.fingerprint, run = excluded.run',
+                    rows,
+                ),
+                ('DELETE FROM files WHERE project = ? AND run <> ?', (code, run)),
+            ]
+        )
+
+    def upsert_projects(self, project_stats: dict[str, dict[str, object]]) -> None:
+        """Insert or update the stats rollups of the projects (updated projects keep their position)."""
+        now = time.time()
+        rows = [(code, json.dumps(stats), now) for code, stats in project_stats.items()]
+        sql = (
+            'INSERT INTO projects (code, stats, updated) VALUES (?, ?, ?)'
+            ' ON CONFLICT(code) DO UPDATE SET stats = excluded.stats, updated = excluded.updated'
+        )
+        self._transaction([(sql, rows)])
+
+    def project_count(self) -> int:
+        """Number of projects with rollups."""
+        with self._lock:
+            return int(self._db.execute('SELECT COUNT(*) FROM projects').fetchone()[0])
+
+    def import_index(self, index_path: PathlikeType) -> int:
+        """Adopt the rollups of an existing index.json (if present) and return the count of projects."""
+        if not pathlib.Path(index_path).is_file():
+            return 0
+        with open(index_path, 'rt', encoding=ENCODING) as handle:
+            index = json.load(handle)
+        self.upsert_projects(index)
+        return len(index)
+
+    def export_index(self) -> dict[str, dict[str, object]]:
+        """The rollups in the index.json format (project code to stats)."""
+        with self._lock:
+            rows = self._db.execute('SELECT code, stats FROM projects ORDER BY rowid').fetchall()
+        return {code: json.loads(stats) for code, stats in rows}
+
+    def write_index(self, index_path: PathlikeType) -> None:
+        """Replace the index.json at path atomically with the exported rollups."""
+        a_path = pathlib.Path(index_path)
+        partial = a_path.with_name(f'{a_path.name}.partial')
+        with open(partial, 'wt', encoding=ENCODING) as handle:
+            json.dump(self.export_index(), handle, indent=2)
+        os.replace(partial, a_path)
+
+    def _files(self, where: str, parameters: tuple[object, ...], order: str, limit: int) -> list[dict[str, object]]:
+        sql = f'SELECT {", ".join(FILE_COLUMNS)} FROM files WHERE {where} ORDER BY {order}'  # nosec B608
+        if limit > 0:
+            sql += f' LIMIT {int(limit)}'
+        with self._lock:
+            rows = self._db.execute(sql, parameters).fetchall()
+        return [dict(zip(FILE_COLUMNS, row)) for row in rows]
+
+    def modified_since(
+        self, since: Union[dti.datetime, str], project: Union[str, None] = None, limit: int = 0
+    ) -> list[dict[str, object]]:
+        """Archives modified at or after since (UTC) - oldest first."""
+        stamp = since.strftime(ISO_FMT) if isinstance(since, dti.datetime) else since
+        if project is None:
+            return self._files('modified >= ?', (stamp,), 'modified', limit)
+        return self._files('project = ? AND modified >= ?', (project.upper(), stamp), 'modified', limit)
+
+    def largest(self, limit: int = 10, project: Union[str, None] = None) -> list[dict[str, object]]:
+        """The largest archives (by compressed size)."""
+        if project is None:
+            return self._files('1 = 1', (), 'size_bytes DESC', limit)
+        return self._files('project = ?', (project.upper(),), 'size_bytes DESC', limit)
+
+    def serial_range(self, project: str, first: int, last: int) -> list[dict[str, object]]:
+        """Archives of the project with serials from first to last (inclusive)."""
+        return self._files('project = ? AND serial BETWEEN ? AND ?', (project.upper(), first, last), 'serial', 0)
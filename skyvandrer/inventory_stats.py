@@ -0,0 +1,97 @@
+"""Cloud Walker (Norwegian: skyvandrer) - vectorized inventory size, age, and density distributions."""
+
+import datetime as dti
+import math
+from typing import Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None  # type: ignore
+
+SECONDS_PER_DAY = 86_400
+PERCENTILES = (50, 90, 95, 99)
+SIZE_BIN_EDGES = (0, 1 << 10, 4 << 10, 16 << 10, 64 << 10, 256 << 10, 1 << 20, 4 << 20)  # bytes
+AGE_BUCKET_DAYS = (1, 7, 30, 90, 365, 730, 1825)
+SERIAL_BLOCKS = 100  # density is reported for at most this many equal serial ranges per project
+ISO_SUFFIX = '+00:00'
+
+
+def is_available() -> bool:
+    """Report if the distributions can be computed (requires the numpy package)."""
+    return np is not None
+
+
+def arrays_from(collector: dict[str, dict[str, object]]) -> tuple[object, object, object]:
+    """Serials, compressed sizes, and modified epoch seconds of the collected archives as arrays."""
+    if np is None:
+        raise RuntimeError('the inventory distributions require the numpy package')
+    entries = list(collector.values())
+    serials = np.fromiter((entry['serial'] for entry in entries), dtype=np.int64, count=len(entries))
+    sizes = np.fromiter((entry['size_bytes_compresed'] for entry in entries), dtype=np.int64, count=len(entries))
+    stamps = np.array([str(entry['modified']).removesuffix(ISO_SUFFIX) for entry in entries], dtype='datetime64[s]')
+    return serials, sizes, stamps.astype(np.int64).astype(np.float64)
+
+
+def _labels(edges: tuple[int, ...], unit: str) -> list[str]:
+    """Bucket labels from ascending upper edges (with an open last bucket)."""
+    return [f'<={edge}{unit}' for edge in edges] + [f'>{edges[-1]}{unit}']
+
+
+def scalar_stats(serials: object, sizes: object, mtimes: object) -> dict[str, Union[int, float]]:
+    """Sum and extremes of the compressed sizes, extremes of the modified epoch seconds, and the lowest serial."""
+    if np is None:
+        raise RuntimeError('the inventory distributions require the numpy package')
+    serials = np.asarray(serials, dtype=np.int64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    mtimes = np.asarray(mtimes, dtype=np.float64)
+    return {
+        'sum_size': int(sizes.sum()),
+        'min_size': int(sizes.min()),
+        'max_size': int(sizes.max()),
+        'min_mtime': float(mtimes.min()),
+        'max_mtime': float(mtimes.max()),
+        'min_serial': int(serials.min()),
+    }
+
+
+def distribution_stats(
+    serials: object, sizes: object, mtimes: object, max_serial: int, now: Union[dti.datetime, None] = None
+) -> dict[str, object]:
+    """Percentiles and histograms of compressed sizes and modification ages and the density per serial range."""
+    if np is None:
+        raise RuntimeError('the inventory distributions require the numpy package')
+    serials = np.asarray(serials, dtype=np.int64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    if not len(serials):
+        return {}
+    now_epoch = (now or dti.datetime.now(tz=dti.timezone.utc)).timestamp()
+    ages_days = (now_epoch - np.asarray(mtimes, dtype=np.float64)) / SECONDS_PER_DAY
+
+    size_edges = np.array(SIZE_BIN_EDGES[1:], dtype=np.int64)
+    size_counts = np.bincount(np.searchsorted(size_edges, sizes, side='left'), minlength=len(size_edges) + 1)
+    age_edges = np.array(AGE_BUCKET_DAYS, dtype=np.float64)
+    age_counts = np.bincount(np.searchsorted(age_edges, ages_days, side='left'), minlength=len(age_edges) + 1)
+
+    block = max(1, math.ceil(max_serial / SERIAL_BLOCKS))
+    block_count = math.ceil(max_serial / block)
+    found_per_block = np.bincount((serials - 1) // block, minlength=block_count)[:block_count]
+    firsts = np.arange(block_count, dtype=np.int64) * block + 1
+    lasts = np.minimum(firsts + block - 1, max_serial)
+
+    return {
+        'size_bytes_compressed': {
+            'mean': float(sizes.mean()),
+            'percentiles': {f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(sizes, PERCENTILES))},
+            'histogram': dict(zip(_labels(SIZE_BIN_EDGES[1:], 'B'), size_counts.tolist())),
+        },
+        'modified_age_days': {
+            'mean': float(ages_days.mean()),
+            'percentiles': {f'p{p}': float(v) for p, v in zip(PERCENTILES, np.percentile(ages_days, PERCENTILES))},
+            'buckets': dict(zip(_labels(AGE_BUCKET_DAYS, 'd'), age_counts.tolist())),
+        },
+        'serial_density': [
+            {'first': int(first), 'last': int(last), 'found': int(found), 'density': float(found / (last - first + 1))}
+            for first, last, found in zip(firsts, lasts, found_per_block)
+        ],
+    }
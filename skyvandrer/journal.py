@@ -0,0 +1,191 @@
+"""Cloud Walker (Norwegian: skyvandrer) - persistent resumable fetch job journal (SQLite)."""
+
+import concurrent.futures as cf
+import os
+import pathlib
+import time
+from typing import Iterable, Union
+
+from requests.auth import HTTPBasicAuth
+
+import skyvandrer.changelog as changelog
+import skyvandrer.codec as codec
+import skyvandrer.rest as rest
+from skyvandrer import APP_ENV, ISSUE_STORAGE, log
+from skyvandrer.fetch import FETCH_WORKERS, PASSTHROUGH, WAIT_MAX_MILLIS, fetch_issue, valid_issue_keys
+from skyvandrer.sqlite_store import SQLiteStore
+
+PathlikeType = Union[str, pathlib.Path]
+
+JOURNAL_DEFAULT = ISSUE_STORAGE.parent / 'fetch-journal.sqlite'
+JOURNAL = os.getenv(f'{APP_ENV}_JOURNAL', '')  # empty disables the journal
+MAX_ATTEMPTS = int(os.getenv(f'{APP_ENV}_JOURNAL_MAX_ATTEMPTS', '5'))
+BACKOFF_SECONDS = float(os.getenv(f'{APP_ENV}_JOURNAL_BACKOFF_SECONDS', '60'))
+BACKOFF_MAX_SECONDS = 24 * 60 * 60.0
+
+QUEUED = 'queued'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+MISSING = 'missing'
+FAILED = 'failed'
+STATES = (QUEUED, IN_FLIGHT, DONE, MISSING, FAILED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    not_before REAL NOT NULL DEFAULT 0,
+    owner INTEGER,
+    changed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, not_before);
+"""
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before the next attempt of a key that failed attempts times (exponential, capped)."""
+    return float(min(BACKOFF_SECONDS * 2 ** max(0, attempts - 1), BACKOFF_MAX_SECONDS))
+
+
+def pid_alive(pid: int) -> bool:
+    """Report if a process with pid exists on this machine."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Journal(SQLiteStore):
+    """Job states per issue key shared by the fetcher processes of one machine.
+
+    Claims run in immediate transactions so concurrent processes never receive the same key.
+    """
+
+    def __init__(self, path: PathlikeType = JOURNAL_DEFAULT, max_attempts: int = MAX_ATTEMPTS) -> None:
+        super().__init__(path, SCHEMA)
+        self.max_attempts = max_attempts
+        self.owner = os.getpid()
+
+    def enqueue(self, keys: Iterable[str], refresh: bool = False) -> int:
+        """Queue the new keys and return the count added (or requeued).
+
+        Known keys keep their state, so repeating a run resumes it. With refresh keys finished in earlier runs
+        (done or missing) are queued again (e.g. so a sync refetches changed issues), while queued, in flight,
+        and failed keys keep their state (and backoff) either way.
+        """
+        now = time.time()
+        with self._immediate() as db:
+            before = db.total_changes
+            if refresh:
+                db.executemany(
+                    'INSERT INTO jobs (key, state, changed) VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET'
+                    ' state = excluded.state, attempts = 0, last_error = NULL, not_before = 0, owner = NULL,'
+                    ' changed = excluded.changed WHERE jobs.state IN (?, ?)',
+                    ((a_key, QUEUED, now, DONE, MISSING) for a_key in keys),
+                )
+            else:
+                db.executemany(
+                    'INSERT OR IGNORE INTO jobs (key, state, changed) VALUES (?, ?, ?)',
+                    ((a_key, QUEUED, now) for a_key in keys),
+                )
+            added = db.total_changes - before
+        return added
+
+    def recover(self) -> int:
+        """Requeue the keys left in flight by processes that no longer exist and return the count."""
+        with self._lock:
+            rows = self._db.execute('SELECT key, owner FROM jobs WHERE state = ?', (IN_FLIGHT,)).fetchall()
+            orphans = [(QUEUED, time.time(), a_key) for a_key, owner in rows if owner is None or not pid_alive(owner)]
+            if orphans:
+                self._db.executemany('UPDATE jobs SET state = ?, owner = NULL, changed = ? WHERE key = ?', orphans)
+        return len(orphans)
+
+    def claim(self, limit: int) -> list[str]:
+        """Move up to limit queued (or due failed) keys in flight for this process and return them."""
+        now = time.time()
+        with self._immediate() as db:
+            rows = db.execute(
+                'SELECT key FROM jobs WHERE state = ? OR (state = ? AND attempts < ? AND not_before <= ?)'
+                ' ORDER BY attempts, changed LIMIT ?',
+                (QUEUED, FAILED, self.max_attempts, now, limit),
+            ).fetchall()
+            keys = [row[0] for row in rows]
+            db.executemany(
+                'UPDATE jobs SET state = ?, owner = ?, attempts = attempts + 1, changed = ? WHERE key = ?',
+                ((IN_FLIGHT, self.owner, now, a_key) for a_key in keys),
+            )
+        return keys
+
+    def finish(self, a_key: str, state: str, error: Union[str, None] = None) -> None:
+        """Record the outcome of the attempt for the key (failures are due again after a backoff)."""
+        now = time.time()
+        with self._lock:
+            if state == FAILED:
+                (attempts,) = self._db.execute('SELECT attempts FROM jobs WHERE key = ?', (a_key,)).fetchone()
+                self._db.execute(
+                    'UPDATE jobs SET state = ?, owner = NULL, last_error = ?, not_before = ?, changed = ?'
+                    ' WHERE key = ?',
+                    (FAILED, error, now + backoff_seconds(attempts), now, a_key),
+                )
+            else:
+                self._db.execute(
+                    'UPDATE jobs SET state = ?, owner = NULL, changed = ? WHERE key = ?', (state, now, a_key)
+                )
+
+    def counts(self) -> dict[str, int]:
+        """Number of keys per state."""
+        with self._lock:
+            rows = self._db.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall()
+        found = dict(rows)
+        return {state: found.get(state, 0) for state in STATES}
+
+
+def fetch_issues_journaled(
+    args: Iterable[str],
+    auth_token: HTTPBasicAuth,
+    journal_path: PathlikeType = JOURNAL_DEFAULT,
+    wait_max_millis: float = WAIT_MAX_MILLIS,
+    workers: int = FETCH_WORKERS,
+    passthrough: bool = PASSTHROUGH,
+    codec_spec: str = codec.CODEC_SPEC,
+    full_changelog: bool = changelog.FULL_CHANGELOG,
+    refresh: bool = False,
+) -> dict[str, int]:
+    """Fetch the journaled keys (after adding the keys in args) until none is claimable and return the state counts.
+
+    Without args (or with the same args) an interrupted run is resumed. With refresh the keys in args that were
+    finished in earlier runs are fetched again. Keys that failed are retried in later runs once their backoff
+    has passed (up to the maximum attempts). Several processes may work on the same journal.
+    """
+    journal = Journal(journal_path)
+    added = journal.enqueue(valid_issue_keys(args), refresh=refresh)
+    recovered = journal.recover()
+    log.info(f'journal ({journal.path}) queued {added} keys, recovered {recovered} orphans, states {journal.counts()}')
+    workers = max(1, workers)
+    if rest.transport().pool_maxsize < workers:
+        rest.configure(pool_maxsize=workers)
+
+    def attempt(a_key: str) -> None:
+        try:
+            location = fetch_issue(a_key, auth_token, wait_max_millis, passthrough, codec_spec, full_changelog)
+        except Exception as err:  # noqa
+            log.error(f'failed fetching {a_key}: {err}')
+            journal.finish(a_key, FAILED, str(err))
+            return
+        journal.finish(a_key, DONE if location is not None else MISSING)
+
+    try:
+        with cf.ThreadPoolExecutor(max_workers=workers) as executor:
+            while keys := journal.claim(2 * workers):
+                list(executor.map(attempt, keys))
+        counts = journal.counts()
+    finally:
+        journal.close()
+    log.info(f'journal states {counts}')
+    log.info(f'transport stats {rest.transport().stats()}')
+    return counts
@@ -0,0 +1,65 @@
+"""Cloud Walker (Norwegian: skyvandrer) - persistent negative cache of non-existing issue keys."""
+
+import os
+import pathlib
+import time
+from typing import Union
+
+from skyvandrer import APP_ENV, ISSUE_STORAGE
+from skyvandrer.sqlite_store import Shared, SQLiteStore
+
+PathlikeType = Union[str, pathlib.Path]
+
+MISSING_CACHE_DEFAULT = ISSUE_STORAGE.parent / 'missing-keys.sqlite'
+MISSING_CACHE = os.getenv(f'{APP_ENV}_MISSING_CACHE', str(MISSING_CACHE_DEFAULT))
+MISSING_RECHECK_DAYS = float(os.getenv(f'{APP_ENV}_MISSING_RECHECK_DAYS', '30'))  # zero asks the server every time
+
+SCHEMA = 'CREATE TABLE IF NOT EXISTS missing (key TEXT PRIMARY KEY, checked REAL NOT NULL)'
+
+
+class MissingKeys(SQLiteStore):
+    """Issue keys the server reported as non-existing with the time of the last check."""
+
+    def __init__(self, path: PathlikeType = MISSING_CACHE, recheck_days: float = MISSING_RECHECK_DAYS) -> None:
+        super().__init__(path, SCHEMA)
+        self.recheck_seconds = recheck_days * 24 * 60 * 60
+        self.skipped = 0
+        self.recorded = 0
+
+    def is_known(self, issue_key: str) -> bool:
+        """Report if the key was found missing within the re-check interval."""
+        if self.recheck_seconds <= 0:
+            return False
+        with self._lock:
+            row = self._db.execute('SELECT checked FROM missing WHERE key = ?', (issue_key.upper(),)).fetchone()
+            known = row is not None and time.time() - row[0] < self.recheck_seconds
+            if known:
+                self.skipped += 1
+        return known
+
+    def remember(self, issue_key: str) -> None:
+        """Record that the server reported the key as non-existing just now."""
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO missing (key, checked) VALUES (?, ?)', (issue_key.upper(), time.time())
+            )
+            self.recorded += 1
+
+    def forget(self, issue_key: str) -> None:
+        """Drop the key (e.g. after it was delivered)."""
+        with self._lock:
+            self._db.execute('DELETE FROM missing WHERE key = ?', (issue_key.upper(),))
+
+    def stats(self) -> dict[str, int]:
+        """Cached keys and the skips and records of this process."""
+        with self._lock:
+            (count,) = self._db.execute('SELECT COUNT(*) FROM missing').fetchone()
+        return {'keys': count, 'skipped': self.skipped, 'recorded': self.recorded}
+
+
+_cache = Shared(MissingKeys, 'negative cache of missing keys')
+
+
+def missing_keys() -> MissingKeys:
+    """The process wide negative cache (opened on first use)."""
+    return _cache()
@@ -0,0 +1,103 @@
+"""Cloud Walker (Norwegian: skyvandrer) - startAt/maxResults pagination."""
+
+import collections
+import concurrent.futures as cf
+import json
+import os
+from typing import Iterator
+
+import skyvandrer.rest as rest
+from skyvandrer import APP_ENV, CollectorType, QueryType
+
+PAGE_CONCURRENCY = int(os.getenv(f'{APP_ENV}_PAGE_CONCURRENCY', '1'))  # pages in flight after the first one
+
+
+def fetch_page(url: str, headers: dict[str, str], query: QueryType, auth: str, start_at: int) -> dict[str, object]:
+    """Retrieve and parse the page starting at start_at."""
+    page_query = {**query, 'startAt': start_at}
+    return json.loads(rest.get(url, headers=headers, params=page_query, auth=auth))  # type: ignore
+
+
+def check_page(collector: CollectorType, data: dict[str, object]) -> int:
+    """Verify the page is consistent with the pages seen so far and return its capacity."""
+    total = data['total']
+    if not collector['total_count']:
+        collector['total_count'] = total  # type: ignore
+    elif collector['total_count'] != total:
+        raise IndexError(f'initial total_count({collector["total_count"]}) != ({total})')
+
+    max_results = data['maxResults']
+    if not collector['page_capacity']:
+        collector['page_capacity'] = max_results  # type: ignore
+    elif collector['page_capacity'] != max_results:
+        raise IndexError(f'initial page_capacity({collector["page_capacity"]}) != ({max_results})')
+
+    return max_results  # type: ignore
+
+
+def page_entries(collector: CollectorType, data: dict[str, object]) -> list[object]:
+    """Check the page, update the pagination metadata of the collector, and return the page values."""
+    check_page(collector, data)
+    collector['is_complete'] = bool(data['isLast'])
+    collector['roundtrip_count'] += 1  # type: ignore
+    return data['values']  # type: ignore
+
+
+def has_errors(collector: CollectorType, data: dict[str, object]) -> bool:
+    """Record any error messages of the page in the collector and report if there were some."""
+    error_messages = data.get('errorMessages', [])
+    if not error_messages:
+        return False
+    collector.setdefault('error_messages', []).extend(error_messages)  # type: ignore
+    collector.setdefault('errors', []).extend(data.get('errors', []))  # type: ignore
+    return True
+
+
+def iter_pages(
+    url: str,
+    headers: dict[str, str],
+    query: QueryType,
+    auth: str,
+    collector: CollectorType,
+    concurrency: int = PAGE_CONCURRENCY,
+) -> Iterator[object]:
+    """Yield the values of all pages as they arrive and keep the pagination metadata in the collector current.
+
+    With concurrency above one the offsets known from the first page are requested in parallel through a window
+    of at most concurrency pages in flight and the values are yielded in offset order (bounded memory).
+    """
+    my_start = 0
+    data = fetch_page(url, headers, query, auth, my_start)
+    if has_errors(collector, data):
+        return
+    yield from page_entries(collector, data)
+    my_start += collector['page_capacity']  # type: ignore
+
+    if concurrency > 1 and not collector['is_complete']:
+        offsets = iter(range(my_start, collector['total_count'], collector['page_capacity']))  # type: ignore
+        in_flight: collections.deque[cf.Future[dict[str, object]]] = collections.deque()
+        executor = cf.ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            for start_at in offsets:
+                in_flight.append(executor.submit(fetch_page, url, headers, query, auth, start_at))
+                if len(in_flight) >= concurrency:
+                    break
+            while in_flight:
+                data = in_flight.popleft().result()
+                if has_errors(collector, data):
+                    return
+                next_start = next(offsets, None)
+                if next_start is not None:
+                    in_flight.append(executor.submit(fetch_page, url, headers, query, auth, next_start))
+                yield from page_entries(collector, data)
+                my_start += collector['page_capacity']  # type: ignore
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)  # consumers may stop iterating early
+
+    while not collector['is_complete']:
+        data = fetch_page(url, headers, query, auth, my_start)
+        if has_errors(collector, data):
+            return
+        yield from page_entries(collector, data)
+        my_start += collector['page_capacity']  # type: ignore
+
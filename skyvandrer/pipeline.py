@@ -0,0 +1,194 @@
+"""Cloud Walker (Norwegian: skyvandrer) - staged issue fetching (download, compress, write)."""
+
+import concurrent.futures as cf
+import os
+import queue
+import threading
+import time
+from typing import Iterable, Union
+
+from requests.auth import HTTPBasicAuth
+
+import skyvandrer.changelog as changelog
+import skyvandrer.codec as codec
+import skyvandrer.missing as missing
+import skyvandrer.rest as rest
+from skyvandrer import APP_ENV, log
+from skyvandrer.fetch import (
+    FETCH_WORKERS,
+    PASSTHROUGH,
+    WAIT_MAX_MILLIS,
+    canonical_issue_key,
+    discard_alias_archive,
+    download_issue,
+    store_issue,
+    valid_issue_keys,
+)
+
+COMPRESS_WORKERS = int(os.getenv(f'{APP_ENV}_COMPRESS_WORKERS', '0'))  # zero compresses inline in the fetcher
+QUEUE_BOUND = int(os.getenv(f'{APP_ENV}_QUEUE_BOUND', '64'))  # documents waiting between two stages
+DONE = None  # end of stream marker
+
+
+def compress_payload(payload: bytes, codec_spec: str = codec.CODEC_SPEC) -> bytes:
+    """Compress one serialized issue to the archive format (runs in the worker processes)."""
+    return codec.codec_from_spec(codec_spec).compress(payload)
+
+
+class Stage:
+    """Throughput and queue depth bookkeeping of one pipeline stage."""
+
+    def __init__(self, name: str, inbox: Union[queue.Queue, None] = None) -> None:
+        self.name = name
+        self.inbox = inbox
+        self.items = 0
+        self.bytes = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self.depth_sum = 0
+        self.depth_samples = 0
+        self._lock = threading.Lock()
+
+    def sample(self) -> None:
+        """Record the current depth of the inbound queue."""
+        if self.inbox is None:
+            return
+        depth = self.inbox.qsize()
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+            self.depth_sum += depth
+            self.depth_samples += 1
+
+    def account(self, size: int, seconds: float) -> None:
+        """Record one processed document."""
+        with self._lock:
+            self.items += 1
+            self.bytes += size
+            self.busy_seconds += seconds
+
+    def report(self, wall_seconds: float) -> dict[str, float]:
+        """Summary of the stage for the run."""
+        return {
+            'items': self.items,
+            'megabytes': self.bytes / 1e6,
+            'items_per_second': self.items / wall_seconds if wall_seconds else 0.0,
+            'megabytes_per_second': self.bytes / 1e6 / wall_seconds if wall_seconds else 0.0,
+            'busy_seconds': self.busy_seconds,
+            'max_queue_depth': self.max_depth,
+            'mean_queue_depth': self.depth_sum / self.depth_samples if self.depth_samples else 0.0,
+        }
+
+
+def fetch_issues_pipelined(
+    args: Iterable[str],
+    auth_token: HTTPBasicAuth,
+    wait_max_millis: float = WAIT_MAX_MILLIS,
+    workers: int = FETCH_WORKERS,
+    passthrough: bool = PASSTHROUGH,
+    compressors: int = COMPRESS_WORKERS,
+    queue_bound: int = QUEUE_BOUND,
+    codec_spec: str = codec.CODEC_SPEC,
+    full_changelog: bool = changelog.FULL_CHANGELOG,
+) -> dict[str, dict[str, float]]:
+    """Fetch issues with downloads on threads, compression on a process pool, and a single writer.
+
+    The stages are connected by bounded queues so at most about three times queue_bound documents are held.
+    Returns (and logs) per stage throughput and queue depth.
+    """
+    if not args:
+        raise ValueError(f'nothing to pull in args ({args})?')
+    workers = max(1, workers)
+    if rest.transport().pool_maxsize < workers:
+        rest.configure(pool_maxsize=workers)
+
+    keys: queue.Queue = queue.Queue(maxsize=queue_bound)
+    downloaded: queue.Queue = queue.Queue(maxsize=queue_bound)
+    compressed: queue.Queue = queue.Queue(maxsize=queue_bound)
+    stages = {
+        'download': Stage('download', keys),
+        'compress': Stage('compress', downloaded),
+        'write': Stage('write', compressed),
+    }
+    failures = {'count': 0}
+    failures_lock = threading.Lock()
+
+    def failed(a_key: str, error: BaseException) -> None:
+        log.error(f'failed fetching {a_key}: {error}')
+        with failures_lock:
+            failures['count'] += 1
+
+    def download() -> None:
+        try:
+            while (a_key := keys.get()) is not DONE:
+                stages['download'].sample()
+                start = time.monotonic()
+                try:
+                    payload, updated = download_issue(a_key, auth_token, wait_max_millis, passthrough, full_changelog)
+                    if payload is None:
+                        missing.missing_keys().remember(a_key)
+                        continue
+                    stages['download'].account(len(payload), time.monotonic() - start)
+                    item = (a_key, canonical_issue_key(a_key, payload), payload, updated)
+                except Exception as err:  # noqa
+                    failed(a_key, err)
+                    continue
+                downloaded.put(item)
+        finally:
+            downloaded.put(DONE)  # the compressor waits for one marker per download thread
+
+    def compress(executor: cf.ProcessPoolExecutor) -> None:
+        finished = 0
+        try:
+            while finished < workers:
+                item = downloaded.get()
+                stages['compress'].sample()
+                if item is DONE:
+                    finished += 1
+                    continue
+                requested, a_key, payload, updated = item
+                try:
+                    future = executor.submit(compress_payload, payload, codec_spec)
+                except Exception as err:  # noqa - e.g. a broken process pool
+                    failed(a_key, err)
+                    continue
+                compressed.put((requested, a_key, future, updated, time.monotonic()))
+        finally:
+            compressed.put(DONE)
+
+    def write() -> None:
+        while (item := compressed.get()) is not DONE:
+            stages['write'].sample()
+            requested, a_key, future, updated, submitted = item
+            try:
+                blob = future.result()
+                stages['compress'].account(len(blob), time.monotonic() - submitted)
+                start = time.monotonic()
+                store_issue(a_key, blob, codec_spec, updated)
+                discard_alias_archive(requested, a_key)
+                stages['write'].account(len(blob), time.monotonic() - start)
+            except Exception as err:  # noqa
+                failed(a_key, err)
+
+    wall_start = time.monotonic()
+    with cf.ProcessPoolExecutor(max_workers=max(1, compressors)) as executor:
+        threads = [threading.Thread(target=download, name=f'download-{n}') for n in range(workers)]
+        threads.append(threading.Thread(target=compress, args=(executor,), name='compress'))
+        threads.append(threading.Thread(target=write, name='write'))
+        for thread in threads:
+            thread.start()
+        try:
+            for a_key in valid_issue_keys(args):
+                keys.put(a_key)
+        finally:  # a failing feed still drains and ends the stages (the error propagates after the joins)
+            for _ in range(workers):
+                keys.put(DONE)
+            for thread in threads:
+                thread.join()
+    wall_seconds = time.monotonic() - wall_start
+
+    report = {name: stage.report(wall_seconds) for name, stage in stages.items()}
+    report['run'] = {'wall_seconds': wall_seconds, 'failed': failures['count']}
+    for name, summary in report.items():
+        log.info(f'pipeline {name} {summary}')
+    log.info(f'transport stats {rest.transport().stats()}')
+    return report
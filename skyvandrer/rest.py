@@ -1,8 +1,124 @@
 """Cloud Walker (Norwegian: skyvandrer) - REST interface."""
 
+import os
+import threading
+from typing import Union
+
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
-from skyvandrer import API_TOKEN, API_USER, QueryType, log
+import skyvandrer.cache as cache
+from skyvandrer import API_TOKEN, API_USER, APP_ENV, QueryType, env_flag, log
+from skyvandrer.throttle import THROTTLED, TokenBucket
+
+POOL_CONNECTIONS = int(os.getenv(f'{APP_ENV}_POOL_CONNECTIONS', '10'))  # number of hosts to keep pools for
+POOL_MAXSIZE = int(os.getenv(f'{APP_ENV}_POOL_MAXSIZE', '10'))  # connections kept per host
+KEEP_ALIVE = env_flag(f'{APP_ENV}_KEEP_ALIVE', True)
+THROTTLE_RETRIES = int(os.getenv(f'{APP_ENV}_THROTTLE_RETRIES', '3'))
+
+
+class Transport:
+    """Shared session owning a per host connection pool (with keep-alive unless disabled)."""
+
+    def __init__(
+        self, pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE, keep_alive: bool = KEEP_ALIVE
+    ) -> None:
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session = requests.Session()
+        for prefix in ('https://', 'http://'):
+            self.session.mount(prefix, self.adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+        self.limiter = TokenBucket()
+        self._lock = threading.Lock()
+        self.request_count = 0
+
+    def request(self, http_verb: str, url: str, **kwargs: object) -> requests.Response:
+        """Send the request through the rate limiter and the pooled session (retrying throttled responses)."""
+        for attempt in range(THROTTLE_RETRIES + 1):
+            self.limiter.acquire()
+            with self._lock:
+                self.request_count += 1
+            response = self.session.request(http_verb, url, **kwargs)  # type: ignore
+            self.limiter.feedback(response.status_code, response.headers)
+            if response.status_code not in THROTTLED or attempt == THROTTLE_RETRIES:
+                return response
+            response.close()
+        return response
+
+    def stats(self) -> dict[str, float]:
+        """Connection reuse counters summed over the live host pools plus the rate limiter state."""
+        opened, served = 0, 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            served += pool.num_requests
+        return {
+            'requests': self.request_count,
+            'connections_opened': opened,
+            'connections_reused': max(0, served - opened),
+            **self.limiter.stats(),
+        }
+
+    def close(self) -> None:
+        """Release all pooled connections."""
+        self.session.close()
+
+
+_transport: Union[Transport, None] = None
+_transport_lock = threading.Lock()
+
+
+def transport() -> Transport:
+    """Access the process wide transport (created on first use)."""
+    global _transport  # pylint: disable=global-statement
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
+
+
+def configure(
+    pool_connections: int = POOL_CONNECTIONS, pool_maxsize: int = POOL_MAXSIZE, keep_alive: bool = KEEP_ALIVE
+) -> Transport:
+    """Replace the process wide transport with one using the given pool settings."""
+    global _transport  # pylint: disable=global-statement
+    with _transport_lock:
+        previous = _transport
+        _transport = Transport(pool_connections=pool_connections, pool_maxsize=pool_maxsize, keep_alive=keep_alive)
+        if previous is not None:
+            _transport.limiter = previous.limiter
+            previous.close()
+        return _transport
+
+
+_response_cache: Union[cache.ResponseCache, None] = None
+
+
+def response_cache() -> Union[cache.ResponseCache, None]:
+    """Access the process wide response cache (None unless enabled per SKYVANDRER_CACHE)."""
+    global _response_cache  # pylint: disable=global-statement
+    if not cache.CACHE_ENABLED:
+        return None
+    with _transport_lock:
+        if _response_cache is None:
+            _response_cache = cache.ResponseCache()
+        return _response_cache
+
+
+def stats() -> dict[str, dict[str, float]]:
+    """Transport and (if enabled) response cache counters."""
+    collected = {'transport': transport().stats()}
+    the_cache = response_cache()
+    if the_cache is not None:
+        collected['cache'] = the_cache.stats()  # type: ignore
+    return collected
 
 
 def invoke(http_verb: str, url: str, headers: dict[str, str], params: QueryType, auth: str) -> str:
@@ -12,7 +128,28 @@ def invoke(http_verb: str, url: str, headers: dict[str, str], params: QueryType,
     log.info(f'{headers=}')
     log.info(f'{params=}')
     log.info(f'{auth=}')
-    response = requests.request(http_verb, url, headers=headers, params=params, auth=auth)  # type: ignore
+    the_cache = response_cache()
+    ttl = cache.ttl_for(url) if the_cache is not None and http_verb.upper() == 'GET' else None
+    if the_cache is None or ttl is None:
+        response = transport().request(http_verb, url, headers=headers, params=params, auth=auth)
+        return response.text
+
+    key = cache.cache_key(http_verb, url, params, user=getattr(auth, 'username', ''))
+    entry = the_cache.lookup(key)
+    if entry is not None and the_cache.is_fresh(entry, ttl):
+        the_cache.count('hits')
+        return entry['text']  # type: ignore
+
+    conditional_headers = {**headers, **the_cache.validators(entry)} if entry is not None else headers
+    response = transport().request(http_verb, url, headers=conditional_headers, params=params, auth=auth)
+    if entry is not None and response.status_code == 304:
+        the_cache.count('revalidations')
+        the_cache.touch(key, entry)
+        return entry['text']  # type: ignore
+
+    the_cache.count('misses')
+    if response.status_code == 200:
+        the_cache.store(key, response.text, response.headers)  # type: ignore
     return response.text
 
 
@@ -0,0 +1,72 @@
+"""Cloud Walker (Norwegian: skyvandrer) - shared SQLite setup of the persistent stores (WAL mode, one lock)."""
+
+import contextlib
+import pathlib
+import sqlite3
+import threading
+from typing import Callable, Generic, Iterator, TypeVar, Union
+
+from skyvandrer import log
+
+PathlikeType = Union[str, pathlib.Path]
+
+BUSY_TIMEOUT_SECONDS = 60  # writers of other processes hold the database at most this long
+
+
+def connect(path: PathlikeType) -> sqlite3.Connection:
+    """Open the database at path in autocommit and WAL mode for use from several threads (and processes)."""
+    db = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None, check_same_thread=False)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    return db
+
+
+class SQLiteStore:
+    """Base of the stores keeping one connection to the database at path with the schema applied.
+
+    Subclasses hold the lock around every use of the connection.
+    """
+
+    def __init__(self, path: PathlikeType, schema: str) -> None:
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = connect(self.path)
+        self._db.executescript(schema)
+
+    @contextlib.contextmanager
+    def _immediate(self) -> Iterator[sqlite3.Connection]:
+        """Hold the lock and run the block in one immediate transaction (rolled back on any exception)."""
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._db
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def close(self) -> None:
+        """Release the database connection."""
+        with self._lock:
+            self._db.close()
+
+
+StoreType = TypeVar('StoreType', bound=SQLiteStore)
+
+
+class Shared(Generic[StoreType]):
+    """Process wide instance of a store opened by the factory on first use."""
+
+    def __init__(self, factory: Callable[[], StoreType], label: str) -> None:
+        self.factory = factory
+        self.label = label
+        self.instance: Union[StoreType, None] = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> StoreType:
+        with self._lock:
+            if self.instance is None:
+                self.instance = self.factory()
+                log.debug(f'{self.label} at ({self.instance.path})')
+            return self.instance
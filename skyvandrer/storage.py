@@ -0,0 +1,276 @@
+"""Cloud Walker (Norwegian: skyvandrer) - issue archive storage backends (file per issue or segmented packs)."""
+
+import datetime as dti
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import pathlib
+import threading
+import time
+from typing import Iterator, NamedTuple, Union
+
+import skyvandrer.codec as codec
+from skyvandrer import APP_ENV, DASH, ENCODING, ISSUE_STORAGE, log
+
+PathlikeType = Union[str, pathlib.Path]
+
+FILES = 'files'
+PACKS = 'packs'
+STORAGE_BACKEND = os.getenv(f'{APP_ENV}_STORAGE_BACKEND', FILES)
+SEGMENT_MAX_BYTES = int(os.getenv(f'{APP_ENV}_SEGMENT_MAX_BYTES', str(256 << 20)))
+PACK_INDEX = 'pack-index.jsonl'
+PACK_LOCK = '.pack.lock'
+SEGMENT_TEMPLATE = 'segment-%05d.pack'
+LOCATION_SEP = '#'
+
+
+class StoredEntry(NamedTuple):
+    """Where and how an issue document is stored."""
+
+    key: str  # lower case issue key
+    location: str  # file path or segment path#offset
+    size_bytes: int  # compressed
+    updated: float  # epoch seconds as stamped from fields.updated
+    sha256: Union[str, None]  # of the compressed bytes (None if not recorded)
+    codec: str
+
+
+def epoch_of(updated: dti.datetime) -> float:
+    """The timestamp archives are stamped with for the issue updated datetime."""
+    return time.mktime(updated.timetuple())
+
+
+def project_of(issue_key: str) -> str:
+    """Lower case project code of the issue key."""
+    return issue_key.split(DASH, 1)[0].lower()
+
+
+class FileStore:
+    """One archive file per issue below <root>/<project>/ (mtime carries the updated timestamp)."""
+
+    kind = FILES
+
+    def __init__(self, project: str, root: PathlikeType = ISSUE_STORAGE) -> None:
+        self.project = project.lower()
+        self.folder = pathlib.Path(root, self.project)
+
+    def put(self, issue_key: str, blob: bytes, codec_spec: str, updated: Union[float, None]) -> str:
+        """Store the compressed document and return its location."""
+        self.folder.mkdir(parents=True, exist_ok=True)
+        path = self.folder / f'{issue_key.lower()}{codec.codec_from_spec(codec_spec).suffix}'
+        with open(path, 'wb') as handle:
+            handle.write(blob)
+        codec.discard_other_archives(path)
+        if updated is not None:
+            os.utime(path, (updated, updated))
+        return str(path)
+
+    def find(self, issue_key: str) -> Union[pathlib.Path, None]:
+        """Path of the archive of the issue (or None)."""
+        return codec.find_archive(self.folder, issue_key.lower())
+
+    def get(self, issue_key: str) -> Union[bytes, None]:
+        """The serialized document of the issue (or None)."""
+        path = self.find(issue_key)
+        return codec.read_document(path) if path is not None else None
+
+    def updated(self, issue_key: str) -> Union[float, None]:
+        """The stamped updated timestamp of the stored issue (or None)."""
+        path = self.find(issue_key)
+        return path.stat().st_mtime if path is not None else None
+
+    def entries(self) -> Iterator[StoredEntry]:
+        """All stored issues of the project (fingerprints are left to the caller)."""
+        if not self.folder.is_dir():
+            return
+        with os.scandir(self.folder) as scanner:
+            for item in scanner:
+                if not item.is_file() or not codec.is_archive(item.name):
+                    continue
+                stats = item.stat()
+                name = codec.codec_for_path(item.name).name
+                yield StoredEntry(codec.archive_stem(item.name), item.path, stats.st_size, stats.st_mtime, None, name)
+
+
+class PackStore:
+    """Append only segment files below <root>/<project>/ with a key -> (segment, offset, length, ...) index.
+
+    The index is a JSON lines log (later lines supersede earlier ones for the same key) so appending stays cheap.
+    Documents are read through memory maps of the segments without scanning.
+    """
+
+    kind = PACKS
+
+    def __init__(self, project: str, root: PathlikeType = ISSUE_STORAGE) -> None:
+        self.project = project.lower()
+        self.folder = pathlib.Path(root, self.project)
+        self.index_path = self.folder / PACK_INDEX
+        self._lock = threading.Lock()
+        self._maps: dict[int, mmap.mmap] = {}
+        self._index: dict[str, tuple[int, int, int, float, str, str]] = {}
+        self._index_size = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Read index lines appended since the last load (also by other processes)."""
+        if not self.index_path.is_file():
+            return
+        with open(self.index_path, 'rt', encoding=ENCODING) as handle:
+            handle.seek(self._index_size)
+            for line in handle:
+                if not line.endswith('\n'):
+                    break  # partial line of a concurrent writer
+                key, segment, offset, length, updated, sha256, codec_name = json.loads(line)
+                self._index[key] = (segment, offset, length, updated, sha256, codec_name)
+                self._index_size += len(line.encode(ENCODING))
+
+    def segment_path(self, segment: int) -> pathlib.Path:
+        """Path of the numbered segment."""
+        return self.folder / (SEGMENT_TEMPLATE % segment)
+
+    def _current_segment(self, incoming: int) -> int:
+        pattern = SEGMENT_TEMPLATE.replace('%05d', '*')
+        segments = sorted(int(path.stem.split(DASH)[-1]) for path in self.folder.glob(pattern))
+        if not segments:
+            return 1
+        latest = segments[-1]
+        size = self.segment_path(latest).stat().st_size
+        return latest if size == 0 or size + incoming <= SEGMENT_MAX_BYTES else latest + 1
+
+    def put(self, issue_key: str, blob: bytes, codec_spec: str, updated: Union[float, None]) -> str:
+        """Append the compressed document to the current segment, index it, and return its location."""
+        key = issue_key.lower()
+        codec_name = codec.codec_from_spec(codec_spec).name
+        sha256 = hashlib.sha256(blob).hexdigest()
+        self.folder.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.folder / PACK_LOCK, 'a') as lock_handle:
+            fcntl.flock(lock_handle, fcntl.LOCK_EX)
+            try:
+                self._load_index()
+                segment = self._current_segment(len(blob))
+                with open(self.segment_path(segment), 'ab') as handle:
+                    offset = handle.tell()
+                    handle.write(blob)
+                stamp = time.time() if updated is None else updated
+                record = (segment, offset, len(blob), stamp, sha256, codec_name)
+                line = json.dumps([key, *record]) + '\n'
+                with open(self.index_path, 'at', encoding=ENCODING) as handle:
+                    handle.write(line)
+                self._index[key] = record
+                self._index_size += len(line.encode(ENCODING))
+            finally:
+                fcntl.flock(lock_handle, fcntl.LOCK_UN)
+        return f'{self.segment_path(segment)}{LOCATION_SEP}{offset}'
+
+    def _map(self, segment: int, end: int) -> mmap.mmap:
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            if mapped is not None:
+                mapped.close()
+            with open(self.segment_path(segment), 'rb') as handle:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def raw(self, issue_key: str) -> Union[tuple[bytes, str], None]:
+        """The compressed document and its codec name (or None)."""
+        with self._lock:
+            record = self._index.get(issue_key.lower())
+            if record is None:
+                self._load_index()
+                record = self._index.get(issue_key.lower())
+            if record is None:
+                return None
+            segment, offset, length, _, _, codec_name = record
+            return self._map(segment, offset + length)[offset : offset + length], codec_name
+
+    def get(self, issue_key: str) -> Union[bytes, None]:
+        """The serialized document of the issue (or None)."""
+        found = self.raw(issue_key)
+        if found is None:
+            return None
+        blob, codec_name = found
+        return codec.codec_from_spec(codec_name).decompress(blob)
+
+    def updated(self, issue_key: str) -> Union[float, None]:
+        """The recorded updated timestamp of the stored issue (or None)."""
+        with self._lock:
+            record = self._index.get(issue_key.lower())
+        return record[3] if record is not None else None
+
+    def entries(self) -> Iterator[StoredEntry]:
+        """All stored issues of the project (latest record per key)."""
+        with self._lock:
+            self._load_index()
+            records = sorted(self._index.items())
+        for key, (segment, offset, length, updated, sha256, codec_name) in records:
+            location = f'{self.segment_path(segment)}{LOCATION_SEP}{offset}'
+            yield StoredEntry(key, location, length, updated, sha256, codec_name)
+
+    def close(self) -> None:
+        """Release the memory maps."""
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
+
+
+StoreType = Union[FileStore, PackStore]
+
+_stores: dict[tuple[str, str], StoreType] = {}
+_stores_lock = threading.Lock()
+
+
+def is_pack_folder(folder: PathlikeType) -> bool:
+    """Report if the project folder holds a pack index."""
+    return pathlib.Path(folder, PACK_INDEX).is_file()
+
+
+def open_store(project: str, root: PathlikeType = ISSUE_STORAGE, backend: str = STORAGE_BACKEND) -> StoreType:
+    """The store of the project (an existing pack index wins over the configured backend)."""
+    if backend not in (FILES, PACKS):
+        raise KeyError(f'Unsupported storage backend requested - {backend} is not in {(FILES, PACKS)}')
+    cache_key = (str(pathlib.Path(root, project.lower())), backend)
+    with _stores_lock:
+        if cache_key not in _stores:
+            packed = backend == PACKS or is_pack_folder(pathlib.Path(root, project.lower()))
+            _stores[cache_key] = PackStore(project, root) if packed else FileStore(project, root)
+        return _stores[cache_key]
+
+
+def store_for(issue_key: str, root: PathlikeType = ISSUE_STORAGE, backend: str = STORAGE_BACKEND) -> StoreType:
+    """The store of the project of the issue."""
+    return open_store(project_of(issue_key), root=root, backend=backend)
+
+
+def read_document(issue_key: str, root: PathlikeType = ISSUE_STORAGE) -> Union[bytes, None]:
+    """The serialized document of the issue from whichever backend holds it (or None)."""
+    return store_for(issue_key, root=root).get(issue_key)
+
+
+def migrate_project(project: str, root: PathlikeType = ISSUE_STORAGE) -> int:
+    """Move the per file archives of the project into packs (in place) and return the count moved.
+
+    The compressed bytes are appended as they are (no recompression) and the file mtimes become the recorded
+    updated timestamps. The files are removed only after all of them are indexed.
+    """
+    folder = pathlib.Path(root, project.lower())
+    files = sorted(entry for entry in FileStore(project, root).entries())
+    pack = open_store(project, root=root, backend=PACKS)
+    assert isinstance(pack, PackStore)  # nosec B101
+    for entry in files:
+        with open(entry.location, 'rb') as handle:
+            pack.put(entry.key, handle.read(), entry.codec, entry.updated)
+    for entry in files:
+        pathlib.Path(entry.location).unlink()
+    log.info(f'migrated {len(files)} archives of ({folder}) into packs')
+    return len(files)
+
+
+def migrate(root: PathlikeType = ISSUE_STORAGE, projects: Union[list[str], None] = None) -> dict[str, int]:
+    """Migrate all (or the given) project folders below root into packs."""
+    if not projects:
+        projects = sorted(item.name for item in os.scandir(root) if item.is_dir())
+    return {project: migrate_project(project, root=root) for project in projects}
@@ -0,0 +1,65 @@
+"""Cloud Walker (Norwegian: skyvandrer) - incremental sync driven by the archive updated watermark."""
+
+import datetime as dti
+import json
+import os
+from typing import Iterator, Union
+
+from requests.auth import HTTPBasicAuth
+
+import skyvandrer.rest as rest
+import skyvandrer.storage as storage
+from skyvandrer import API_BASE_URL, APP_ENV, ISSUE_STORAGE, QueryType, log
+
+SEARCH_API_ROOT = '/rest/api/latest/search'
+SEARCH_URL = API_BASE_URL + SEARCH_API_ROOT
+SEARCH_PAGE_SIZE = 100
+JQL_TS_FORMAT = '%Y/%m/%d %H:%M'
+# JQL interprets timestamps in the time zone of the user - the overlap absorbs that and clock skew
+SYNC_OVERLAP_MINUTES = int(os.getenv(f'{APP_ENV}_SYNC_OVERLAP_MINUTES', str(24 * 60)))
+
+
+def high_water_mark(project: str, root: str = str(ISSUE_STORAGE)) -> Union[dti.datetime, None]:
+    """Latest updated timestamp archived for the project (None if nothing is archived yet)."""
+    latest = max((entry.updated for entry in storage.open_store(project, root=root).entries()), default=None)
+    return dti.datetime.fromtimestamp(latest) if latest is not None else None  # inverse of storage.epoch_of
+
+
+def updated_since_jql(project: str, since: Union[dti.datetime, None]) -> str:
+    """JQL selecting the issues of the project updated since the timestamp (all if None)."""
+    jql = f'project = "{project.upper()}"'
+    if since is not None:
+        jql += f' AND updated >= "{since.strftime(JQL_TS_FORMAT)}"'
+    return f'{jql} ORDER BY updated ASC'
+
+
+def iter_search_keys(jql: str, auth_token: HTTPBasicAuth, page_size: int = SEARCH_PAGE_SIZE) -> Iterator[str]:
+    """Yield the keys of the issues matching the JQL query page by page."""
+    headers = {'Accept': 'application/json'}
+    query: QueryType = {'jql': jql, 'fields': 'updated', 'startAt': 0, 'maxResults': page_size}
+    while True:
+        data = json.loads(rest.get(SEARCH_URL, headers=headers, params=query, auth=auth_token))  # type: ignore
+        error_messages = data.get('errorMessages', [])
+        if error_messages:
+            raise ValueError(f'search for ({jql}) failed with ({error_messages})')
+        issues = data.get('issues', [])
+        for issue in issues:
+            yield issue['key']
+        query['startAt'] = data.get('startAt', query['startAt']) + len(issues)  # type: ignore
+        if not issues or query['startAt'] >= data.get('total', 0):  # type: ignore
+            break
+
+
+def updated_keys(
+    project: str,
+    auth_token: HTTPBasicAuth,
+    root: str = str(ISSUE_STORAGE),
+    overlap_minutes: int = SYNC_OVERLAP_MINUTES,
+) -> list[str]:
+    """Keys of the issues of the project updated since the archive watermark (minus the overlap)."""
+    mark = high_water_mark(project, root=root)
+    since = mark - dti.timedelta(minutes=overlap_minutes) if mark is not None else None
+    jql = updated_since_jql(project, since)
+    keys = list(iter_search_keys(jql, auth_token))
+    log.info(f'sync {project.upper()}: watermark({mark}) -> {len(keys)} issues updated per ({jql})')
+    return keys
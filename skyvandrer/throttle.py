@@ -0,0 +1,131 @@
+"""Cloud Walker (Norwegian: skyvandrer) - adaptive rate limiting of outgoing requests."""
+
+import datetime as dti
+import email.utils
+import os
+import threading
+import time
+from typing import Mapping, Union
+
+from skyvandrer import APP_ENV, log
+
+RATE_PER_SECOND = float(os.getenv(f'{APP_ENV}_RATE_PER_SECOND', '10'))  # target rate, zero or negative disables
+RATE_BURST = float(os.getenv(f'{APP_ENV}_RATE_BURST', '10'))
+RATE_FLOOR_PER_SECOND = 0.1
+RATE_DECREASE_FACTOR = 0.5
+RATE_INCREASE_FRACTION = 0.05  # of target rate regained per unthrottled response
+THROTTLED = (429, 503)
+
+
+def parse_retry_after(value: Union[str, None], now: Union[float, None] = None) -> Union[float, None]:
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        stamp = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    return max(0.0, stamp.timestamp() - now)
+
+
+def parse_reset(value: Union[str, None], now: Union[float, None] = None) -> Union[float, None]:
+    """Seconds to wait from a X-RateLimit-Reset header (epoch seconds or ISO timestamp)."""
+    if not value:
+        return None
+    now = time.time() if now is None else now
+    try:
+        epoch = float(value)
+    except ValueError:
+        try:
+            stamp = dti.datetime.fromisoformat(value.strip())
+        except ValueError:
+            return None
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=dti.timezone.utc)
+        epoch = stamp.timestamp()
+    return max(0.0, epoch - now)
+
+
+class TokenBucket:
+    """Token bucket shared by all threads that backs off on throttling and recovers when it stops."""
+
+    def __init__(self, rate: float = RATE_PER_SECOND, burst: float = RATE_BURST) -> None:
+        self.target_rate = rate
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled_count = 0
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Zero or negative target rates disable the limiter."""
+        return self.target_rate > 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """Block until a request may be sent and return the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if not self.enabled and now >= self.blocked_until:
+                    break
+                self._refill(now)
+                if now < self.blocked_until:
+                    pause = self.blocked_until - now
+                elif self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    break
+                else:
+                    pause = (1.0 - self.tokens) / self.rate
+            time.sleep(pause)
+            waited += pause
+        if waited:
+            with self._lock:
+                self.waited_seconds += waited
+        return waited
+
+    def feedback(self, status_code: int, headers: Mapping[str, str]) -> None:
+        """Adapt the rate to the throttling signals of a response."""
+        retry_after = parse_retry_after(headers.get('Retry-After'))
+        remaining = headers.get('X-RateLimit-Remaining')
+        with self._lock:
+            now = time.monotonic()
+            if status_code in THROTTLED:
+                self.throttled_count += 1
+                if self.enabled:
+                    self.rate = max(RATE_FLOOR_PER_SECOND, self.rate * RATE_DECREASE_FACTOR)
+                    self.tokens = min(self.tokens, 0.0)
+                pause = retry_after if retry_after is not None else 1.0 / max(self.rate, RATE_FLOOR_PER_SECOND)
+                self.blocked_until = max(self.blocked_until, now + pause)
+                log.warning(f'throttled ({status_code}) - pausing {pause :5.3f} secs, rate now {self.rate :5.3f}/s')
+                return
+            if remaining is not None and remaining.strip() == '0':
+                reset = parse_reset(headers.get('X-RateLimit-Reset'))
+                if reset is None:
+                    reset = retry_after
+                if reset:
+                    self.blocked_until = max(self.blocked_until, now + reset)
+            elif self.enabled and self.rate < self.target_rate:
+                self.rate = min(self.target_rate, self.rate + self.target_rate * RATE_INCREASE_FRACTION)
+
+    def stats(self) -> dict[str, float]:
+        """Current limiter state and counters."""
+        with self._lock:
+            return {
+                'rate_per_second': self.rate,
+                'target_rate_per_second': self.target_rate,
+                'throttled_count': self.throttled_count,
+                'waited_seconds': self.waited_seconds,
+            }
@@ -0,0 +1,163 @@
+"""Cloud Walker (Norwegian: skyvandrer) - parallel streaming integrity verification of the issue archive."""
+
+import concurrent.futures as cf
+import hashlib
+import io
+import os
+import pathlib
+import time
+from typing import BinaryIO, Union
+
+import skyvandrer.codec as codec
+import skyvandrer.storage as storage
+from skyvandrer import APP_ENV, ISSUE_STORAGE, log
+from skyvandrer.fetch import IDENTITY_PROBE_BYTES, payload_has_data, payload_identity
+
+PathlikeType = Union[str, pathlib.Path]
+# (expected key, file path or pack folder, pack key or None, recorded sha256 or None)
+VerifyTaskType = tuple[str, str, Union[str, None], Union[str, None]]
+
+OK = 'ok'
+CORRUPT = 'corrupt'
+TRUNCATED = 'truncated'
+MISMATCHED_KEY = 'mismatched_key'
+NOT_AN_ISSUE = 'not_an_issue'
+STATUSES = (OK, CORRUPT, TRUNCATED, MISMATCHED_KEY, NOT_AN_ISSUE)
+
+VERIFY_WORKERS = int(os.getenv(f'{APP_ENV}_VERIFY_WORKERS', str(os.cpu_count() or 4)))
+READ_CHUNK_BYTES = 1 << 20
+PROBLEMS_REPORTED = 1000  # cap on the listed problems (the counts are complete)
+
+
+class DocumentProbe:
+    """Keep only the head and the last non whitespace byte of a document streamed through in chunks."""
+
+    def __init__(self) -> None:
+        self.head = b''
+        self.last = b''
+        self.size = 0
+
+    def feed(self, chunk: bytes) -> None:
+        """Account for the next chunk of the document."""
+        if len(self.head) < IDENTITY_PROBE_BYTES:
+            self.head += chunk[: IDENTITY_PROBE_BYTES - len(self.head)]
+        stripped = chunk.rstrip()
+        if stripped:
+            self.last = stripped[-1:]
+        self.size += len(chunk)
+
+    def status(self, expected_key: str) -> tuple[str, str]:
+        """Judge the document shape (an issue object) and the key (as expected)."""
+        if not payload_has_data(self.head) or self.last != b'}':
+            return NOT_AN_ISSUE, f'head({self.head[:32]!r}) last({self.last!r})'
+        delivered, _ = payload_identity(self.head)
+        if delivered is None or delivered.upper() != expected_key.upper():
+            return MISMATCHED_KEY, f'expected({expected_key.upper()}) found({delivered})'
+        return OK, ''
+
+
+def _stream(handle: BinaryIO, the_codec: codec.Codec, probe: DocumentProbe) -> None:
+    """Restore the document chunk by chunk (integrity checks are verified at the end of the stream)."""
+    for chunk in the_codec.iter_document(handle, READ_CHUNK_BYTES):
+        probe.feed(chunk)
+
+
+def verify_task(task: VerifyTaskType) -> dict[str, object]:
+    """Verify one archive file or pack entry (runs in the worker processes).
+
+    Documents of every codec are restored in chunks (integrity checks are verified at the end of the stream) and
+    only the head and the last byte of the document are kept for the shape and key checks (no JSON parse).
+    """
+    expected_key, location, pack_key, recorded = task
+    probe = DocumentProbe()
+    compressed_bytes = 0
+    try:
+        if pack_key is None:
+            compressed_bytes = os.stat(location).st_size
+            with open(location, 'rb') as handle:
+                _stream(handle, codec.codec_for_path(location), probe)
+        else:
+            store = storage.open_store(pathlib.Path(location).name, root=pathlib.Path(location).parent)
+            found = store.raw(pack_key) if isinstance(store, storage.PackStore) else None
+            if found is None:
+                return _outcome(expected_key, location, TRUNCATED, 'not in pack', compressed_bytes, probe)
+            blob, codec_name = found
+            compressed_bytes = len(blob)
+            if recorded and hashlib.sha256(blob).hexdigest() != recorded:
+                return _outcome(expected_key, location, CORRUPT, 'sha256 mismatch', compressed_bytes, probe)
+            _stream(io.BytesIO(blob), codec.codec_from_spec(codec_name), probe)
+    except EOFError as err:
+        return _outcome(expected_key, location, TRUNCATED, str(err), compressed_bytes, probe)
+    except Exception as err:  # noqa - any codec failure (lzma.LZMAError, zstd errors, ...) means corrupt
+        return _outcome(expected_key, location, CORRUPT, f'{type(err).__name__}: {err}', compressed_bytes, probe)
+    status, detail = probe.status(expected_key)
+    return _outcome(expected_key, location, status, detail, compressed_bytes, probe)
+
+
+def _outcome(
+    key: str, location: str, status: str, detail: str, compressed_bytes: int, probe: DocumentProbe
+) -> dict[str, object]:
+    return {
+        'key': key,
+        'location': location,
+        'status': status,
+        'detail': detail,
+        'compressed_bytes': compressed_bytes,
+        'document_bytes': probe.size,
+    }
+
+
+def verify_tasks(root: PathlikeType = ISSUE_STORAGE, projects: Union[list[str], None] = None) -> list[VerifyTaskType]:
+    """The archive files and pack entries of all (or the given) projects below root."""
+    if not projects:
+        with os.scandir(root) as scanner:
+            projects = sorted(item.name for item in scanner if item.is_dir())
+    tasks: list[VerifyTaskType] = []
+    for project in projects:
+        folder = pathlib.Path(root, project.lower())
+        if storage.is_pack_folder(folder):
+            entries = storage.open_store(project, root=root).entries()
+            tasks.extend((entry.key.upper(), str(folder), entry.key, entry.sha256) for entry in entries)
+        elif folder.is_dir():
+            with os.scandir(folder) as scanner:
+                names = sorted(item.name for item in scanner if item.is_file() and codec.is_archive(item.name))
+            tasks.extend((codec.archive_stem(name).upper(), str(folder / name), None, None) for name in names)
+    return tasks
+
+
+def verify_archive(
+    root: PathlikeType = ISSUE_STORAGE, projects: Union[list[str], None] = None, workers: int = VERIFY_WORKERS
+) -> dict[str, object]:
+    """Verify every archive below root on a process pool and report the problems and the throughput."""
+    tasks = verify_tasks(root, projects)
+    counts = {status: 0 for status in STATUSES}
+    problems: list[dict[str, object]] = []
+    compressed_bytes = document_bytes = 0
+    start = time.monotonic()
+    with cf.ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        chunksize = max(1, min(256, len(tasks) // (8 * max(1, workers))))
+        for outcome in executor.map(verify_task, tasks, chunksize=chunksize):
+            counts[outcome['status']] += 1  # type: ignore
+            compressed_bytes += outcome.get('compressed_bytes', 0)  # type: ignore
+            document_bytes += outcome.get('document_bytes', 0)  # type: ignore
+            if outcome['status'] != OK:
+                status, a_key, location = outcome['status'], outcome['key'], outcome['location']
+                log.warning(f'verify {status} {a_key} at ({location}): {outcome["detail"]}')
+                if len(problems) < PROBLEMS_REPORTED:
+                    problems.append(outcome)
+    seconds = time.monotonic() - start
+    report = {
+        'root': str(root),
+        'archives': len(tasks),
+        'counts': counts,
+        'problems': problems,
+        'throughput': {
+            'seconds': seconds,
+            'archives_per_second': len(tasks) / seconds if seconds else 0.0,
+            'compressed_megabytes': compressed_bytes / 1e6,
+            'compressed_megabytes_per_second': compressed_bytes / 1e6 / seconds if seconds else 0.0,
+            'document_megabytes_per_second': document_bytes / 1e6 / seconds if seconds else 0.0,
+        },
+    }
+    log.info(f'verified {len(tasks)} archives below ({root}) in {seconds :.3f} secs: {counts}')
+    return report